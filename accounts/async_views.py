@@ -0,0 +1,35 @@
+"""
+Async versions of read-heavy account views, served only by the ASGI
+application (grading_system.asgi_urls). Under WSGI the sync views in
+accounts.views are used: there an async view only adds an event loop per
+request.
+"""
+from django.shortcuts import render
+
+from .dashboard import aget_class_subjects, aget_school_counts, aget_student_class
+from .decorators import async_login_required
+from .models import TeacherSubject
+
+
+@async_login_required
+async def dashboard(request):
+    context = {}
+    if request.user.user_type == 'admin':
+        # Cached; kept current by the signals in accounts.signals
+        context.update(await aget_school_counts())
+    elif request.user.user_type == 'teacher':
+        context.update({
+            'assigned_subjects': [
+                assignment async for assignment in TeacherSubject.objects.filter(
+                    teacher=request.user
+                ).select_related('subject', 'class_assigned')
+            ],
+        })
+    elif request.user.user_type == 'student':
+        student_class = await aget_student_class(request.user.id)
+        context['student_class'] = student_class
+        if student_class:
+            # Get all subjects taught in this class by any teacher
+            context['subjects_in_class'] = await aget_class_subjects(student_class.class_assigned_id)
+    
+    return render(request, 'dashboard.html', context)
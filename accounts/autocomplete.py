@@ -0,0 +1,188 @@
+from urllib.parse import urlencode
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.urls import reverse
+
+from .models import CustomUser
+from .pagination import decode_cursor, encode_cursor, seek_filter
+
+PER_PAGE = 20
+# Lowercased names, annotated by search_people and served by the functional
+# indexes on (user_type, LOWER(first_name), LOWER(last_name)) and the reverse
+PEOPLE_ORDERING = ['first_lower', 'last_lower', 'id']
+NAMED_ORDERING = ['name', 'id']
+
+
+def person_label(user):
+    # Names repeat in a large school; the email tells two Ada Bellos apart
+    return f"{user.get_full_name()} ({user.email})"
+
+
+def prefix_variants(prefix):
+    """
+    The lowercased spellings a typed prefix is looked up in. SQLite's
+    LOWER() folds ASCII letters only, so "Élodie" is indexed as "Élodie";
+    the second spelling matches that, the first matches full folding.
+    """
+    ascii_folded = ''.join(char.lower() if char.isascii() else char.upper() for char in prefix)
+    return list(dict.fromkeys([prefix.lower(), ascii_folded]))
+
+
+def prefix_range(field, prefix):
+    """
+    `field` starts with `prefix`, written as a range so the database seeks
+    into an index on `field` rather than running LIKE over every row.
+    """
+    condition = Q(**{f'{field}__gte': prefix, f'{field}__startswith': prefix})
+    last = ord(prefix[-1])
+    if last < 0x10FFFF:
+        condition &= Q(**{f'{field}__lt': prefix[:-1] + chr(last + 1)})
+    return condition
+
+
+def _page(rows, per_page, ordering, label):
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    return {
+        'results': [{'id': row.pk, 'text': label(row)} for row in rows],
+        'pagination': {'more': more},
+        'next': encode_cursor([getattr(rows[-1], field) for field in ordering]) if more else None,
+    }
+
+
+def name_conditions(term):
+    """
+    One condition per range query for `term`: the start of the first or
+    the last name, and for several words also the first name starting
+    with the first word and the last name with the rest ("ada bel").
+    """
+    words = term.split()
+    if not words:
+        return [Q()]
+    whole = ' '.join(words)
+    conditions = [
+        prefix_range(field, variant)
+        for field in ('first_lower', 'last_lower')
+        for variant in prefix_variants(whole)
+    ]
+    if len(words) > 1:
+        conditions += [
+            prefix_range('first_lower', first) & prefix_range('last_lower', last)
+            for first in prefix_variants(words[0])
+            for last in prefix_variants(' '.join(words[1:]))
+        ]
+    return conditions
+
+
+def people_queryset(queryset):
+    return queryset.annotate(
+        first_lower=Lower('first_name'), last_lower=Lower('last_name'),
+    ).only('id', 'first_name', 'last_name', 'email').order_by(*PEOPLE_ORDERING)
+
+
+def people_matching(term):
+    """
+    Ids of the users whose name matches `term` as in search_people() or
+    whose email starts with it, for filter(id__in=...) on a paginated list.
+    Each range is its own branch of a UNION so every one seeks its index;
+    the user_type IN lets the name ranges use the lowercased name indexes.
+    """
+    people = people_queryset(CustomUser.objects.filter(
+        user_type__in=[user_type for user_type, _ in CustomUser.USER_TYPE_CHOICES]
+    )).order_by()
+    branches = [people.filter(condition).values('id') for condition in name_conditions(term)]
+    branches += [
+        CustomUser.objects.filter(prefix_range('email', variant)).values('id')
+        for variant in dict.fromkeys([term.strip(), term.strip().lower()])
+    ]
+    return branches[0].union(*branches[1:])
+
+
+def _people(queryset, term, cursor, per_page):
+    if cursor is not None:
+        queryset = queryset.filter(seek_filter(PEOPLE_ORDERING, cursor, backwards=False))
+    found = {}
+    for condition in name_conditions(term):
+        for person in queryset.filter(condition)[:per_page + 1]:
+            found[person.id] = person
+    return sorted(found.values(), key=lambda person: (person.first_lower, person.last_lower, person.id))
+
+
+def search_people(queryset, term, after='', per_page=PER_PAGE):
+    """
+    One page of users whose first or last name starts with `term`, or
+    whose first name starts with its first word and last name with the
+    rest, ignoring case, in name order.
+
+    Each spelling and name field is its own range query on one of the
+    lowercased name indexes and the pages are merged here: an OR of the
+    ranges makes SQLite walk the whole index instead.
+    """
+    queryset = people_queryset(queryset)
+    cursor = decode_cursor(after, len(PEOPLE_ORDERING)) if after else None
+    try:
+        rows = _people(queryset, term, cursor, per_page)
+    except (ValueError, ValidationError):
+        # A tampered cursor with values of the wrong type; start over
+        rows = _people(queryset, term, None, per_page)
+    return _page(rows, per_page, PEOPLE_ORDERING, person_label)
+
+
+def search_named(queryset, term, after='', per_page=PER_PAGE, code=False):
+    """One page of classes or subjects whose name (or subject code) starts with `term`."""
+    term = term.strip()
+    if term:
+        condition = Q(name__istartswith=term)
+        if code:
+            condition |= Q(code__istartswith=term)
+        queryset = queryset.filter(condition)
+    queryset = queryset.order_by(*NAMED_ORDERING)
+    cursor = decode_cursor(after, len(NAMED_ORDERING)) if after else None
+    try:
+        if cursor is not None:
+            rows = list(queryset.filter(seek_filter(NAMED_ORDERING, cursor, backwards=False))[:per_page + 1])
+        else:
+            rows = list(queryset[:per_page + 1])
+    except (ValueError, ValidationError):
+        rows = list(queryset[:per_page + 1])
+    return _page(rows, per_page, NAMED_ORDERING, str)
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    A <select> that renders only its selected option. The page stays the
+    same size however many rows the field's queryset has; select2 loads
+    the rest from the JSON endpoint `url_name` as the user types. The
+    queryset is still what the submitted value is validated against.
+    """
+
+    def __init__(self, url_name, query=None, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.query = dict(query or {})
+
+    def __deepcopy__(self, memo):
+        widget = super().__deepcopy__(memo)
+        widget.query = dict(self.query)
+        return widget
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        url = reverse(self.url_name)
+        if self.query:
+            url += '?' + urlencode(self.query)
+        attrs['data-autocomplete-url'] = url
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [pk for pk in value if str(pk).isdigit()]
+        options = [self.create_option(name, '', '', not selected, 0)]
+        if selected:
+            field = self.choices.field
+            for index, obj in enumerate(self.choices.queryset.filter(pk__in=selected), start=1):
+                options.append(self.create_option(name, obj.pk, field.label_from_instance(obj), True, index))
+        return [(None, options, 0)]
+
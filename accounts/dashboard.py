@@ -0,0 +1,124 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Class, CustomUser, StudentClass, Subject, TeacherSubject
+
+CACHE_TIMEOUT = 60 * 60
+COUNTS_KEY = 'accounts:dashboard_counts'
+CLASS_SUBJECTS_VERSION_KEY = 'accounts:class_subjects_version'
+NO_CLASS = 0
+
+
+def class_subjects_version():
+    version = cache.get(CLASS_SUBJECTS_VERSION_KEY)
+    if version is None:
+        # A random token, not a counter: if the key is evicted, a restart
+        # from 1 would bring entries cached under an old version back
+        version = uuid.uuid4().hex
+        if not cache.add(CLASS_SUBJECTS_VERSION_KEY, version, None):
+            version = cache.get(CLASS_SUBJECTS_VERSION_KEY, version)
+    return version
+
+
+def class_subjects_key(class_id):
+    return f'accounts:class_subjects:{class_subjects_version()}:{class_id}'
+
+
+def student_class_key(student_id):
+    return f'accounts:student_class:{student_id}'
+
+
+def get_school_counts():
+    """Student, teacher, class and subject totals for the admin dashboard."""
+    counts = cache.get(COUNTS_KEY)
+    if counts is None:
+        counts = CustomUser.objects.aggregate(
+            total_students=Count('id', filter=Q(user_type='student')),
+            total_teachers=Count('id', filter=Q(user_type='teacher')),
+        )
+        counts['total_classes'] = Class.objects.count()
+        counts['total_subjects'] = Subject.objects.count()
+        cache.set(COUNTS_KEY, counts, CACHE_TIMEOUT)
+    return counts
+
+
+def get_student_class(student_id):
+    """The student's StudentClass with its class loaded, or None."""
+    student_class = cache.get(student_class_key(student_id))
+    if student_class is None:
+        student_class = StudentClass.objects.filter(
+            student_id=student_id
+        ).select_related('class_assigned').order_by('id').first() or NO_CLASS
+        cache.set(student_class_key(student_id), student_class, CACHE_TIMEOUT)
+    return student_class or None
+
+
+def get_class_subjects(class_id):
+    """Every TeacherSubject of a class with its subject and teacher loaded."""
+    subjects = cache.get(class_subjects_key(class_id))
+    if subjects is None:
+        subjects = list(TeacherSubject.objects.filter(
+            class_assigned_id=class_id
+        ).select_related('subject', 'teacher').order_by('subject__name', 'id'))
+        cache.set(class_subjects_key(class_id), subjects, CACHE_TIMEOUT)
+    return subjects
+
+
+# The same, on the async ORM and cache API, for the ASGI dashboard (accounts.async_views)
+
+async def aget_school_counts():
+    counts = await cache.aget(COUNTS_KEY)
+    if counts is None:
+        counts = await CustomUser.objects.aaggregate(
+            total_students=Count('id', filter=Q(user_type='student')),
+            total_teachers=Count('id', filter=Q(user_type='teacher')),
+        )
+        counts['total_classes'] = await Class.objects.acount()
+        counts['total_subjects'] = await Subject.objects.acount()
+        await cache.aset(COUNTS_KEY, counts, CACHE_TIMEOUT)
+    return counts
+
+
+async def aget_student_class(student_id):
+    student_class = await cache.aget(student_class_key(student_id))
+    if student_class is None:
+        student_class = await StudentClass.objects.filter(
+            student_id=student_id
+        ).select_related('class_assigned').order_by('id').afirst() or NO_CLASS
+        await cache.aset(student_class_key(student_id), student_class, CACHE_TIMEOUT)
+    return student_class or None
+
+
+async def aget_class_subjects(class_id):
+    # The version lookup may add the key; one hop instead of two
+    key = await sync_to_async(class_subjects_key)(class_id)
+    subjects = await cache.aget(key)
+    if subjects is None:
+        subjects = [
+            teacher_subject async for teacher_subject in TeacherSubject.objects.filter(
+                class_assigned_id=class_id
+            ).select_related('subject', 'teacher').order_by('subject__name', 'id')
+        ]
+        await cache.aset(key, subjects, CACHE_TIMEOUT)
+    return subjects
+
+
+def invalidate_school_counts():
+    cache.delete(COUNTS_KEY)
+
+
+def invalidate_class_subjects():
+    """
+    Drop every class subject list at once. Assignments can move between
+    classes and one teacher or subject shows up in many lists, so a version
+    bump is simpler than working out which lists are affected.
+    """
+    # incr() is a get and a set on the file cache and would give the key a timeout
+    cache.set(CLASS_SUBJECTS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_student_class(student_ids):
+    cache.delete_many([student_class_key(student_id) for student_id in student_ids])
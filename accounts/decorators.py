@@ -0,0 +1,30 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def _load_user(request):
+    # Touching an attribute makes the lazy request.user read the session and user tables
+    request.user.is_authenticated
+    return request.user
+
+
+async def aget_user(request):
+    """request.user for async views, loaded in a worker thread instead of on the event loop."""
+    return await sync_to_async(_load_user)(request)
+
+
+def async_login_required(view):
+    """
+    login_required for async views; Django 4.2's decorator only wraps sync
+    ones. request.user is loaded before the view runs, so the view can use
+    it without touching the database.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
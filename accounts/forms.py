@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from .models import CustomUser, Class, Subject, TeacherSubject, StudentClass, StudentSubject
+from .autocomplete import AutocompleteSelect, person_label
 
 class CustomUserCreationForm(UserCreationForm):
     class Meta:
@@ -26,18 +27,29 @@ class TeacherSubjectForm(forms.ModelForm):
     class Meta:
         model = TeacherSubject
         fields = ['teacher', 'subject', 'class_assigned']
+        widgets = {
+            'teacher': AutocompleteSelect('autocomplete_teachers'),
+            'subject': AutocompleteSelect('autocomplete_subjects'),
+            'class_assigned': AutocompleteSelect('autocomplete_classes'),
+        }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['teacher'].queryset = CustomUser.objects.filter(user_type='teacher')
+        self.fields['teacher'].label_from_instance = person_label
 
 class StudentClassForm(forms.ModelForm):
     class Meta:
         model = StudentClass
         fields = ['student', 'class_assigned']
+        widgets = {
+            'student': AutocompleteSelect('autocomplete_students'),
+            'class_assigned': AutocompleteSelect('autocomplete_classes'),
+        }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['student'].queryset = CustomUser.objects.filter(user_type='student')
+        self.fields['student'].label_from_instance = person_label
 
  
\ No newline at end of file
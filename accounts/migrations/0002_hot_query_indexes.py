@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['user_type', 'first_name', 'last_name'], name='accounts_cu_user_ty_eb7517_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersubject',
+            index=models.Index(fields=['class_assigned', 'subject'], name='accounts_te_class_a_f5f592_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-17 21:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('first_name'), django.db.models.functions.text.Lower('last_name'), name='accounts_user_first_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('last_name'), django.db.models.functions.text.Lower('first_name'), name='accounts_user_last_lower_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 
 class CustomUser(AbstractUser):
     USER_TYPE_CHOICES = (
@@ -16,6 +18,15 @@ class CustomUser(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'user_type']
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Role-filtered lists ordered by name; the trailing id comes with the index
+            models.Index(fields=['user_type', 'first_name', 'last_name']),
+            # Case-insensitive name search (accounts.autocomplete), by first or by last name
+            models.Index(F('user_type'), Lower('first_name'), Lower('last_name'), name='accounts_user_first_lower_idx'),
+            models.Index(F('user_type'), Lower('last_name'), Lower('first_name'), name='accounts_user_last_lower_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.get_full_name()} ({self.user_type})"
 
@@ -45,6 +56,10 @@ class TeacherSubject(models.Model):
     
     class Meta:
         unique_together = ['teacher', 'subject', 'class_assigned']
+        indexes = [
+            # "Does this class already have a teacher for this subject?"
+            models.Index(fields=['class_assigned', 'subject']),
+        ]
     
     def __str__(self):
         return f"{self.teacher.get_full_name()} - {self.subject.name} - {self.class_assigned.name}"
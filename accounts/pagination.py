@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+PER_PAGE = 50
+
+
+def _json_value(value):
+    # Full precision: DjangoJSONEncoder drops microseconds, which would skip rows
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Cannot use {type(value).__name__} in a page cursor')
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, default=_json_value).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Return the list of sort values in a cursor, or None if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def _sort_value(obj, path):
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def seek_filter(ordering, values, backwards):
+    """
+    Rows strictly after `values` in `ordering` (or strictly before, going
+    backwards), written as (a > x) OR (a = x AND b > y) OR ... so the
+    database can seek along an index on the sort columns.
+    """
+    condition = Q()
+    for position, field in enumerate(ordering):
+        descending = field.startswith('-') != backwards
+        clause = Q(**{f"{field.lstrip('-')}__{'lt' if descending else 'gt'}": values[position]})
+        for previous, value in zip(ordering[:position], values[:position]):
+            clause &= Q(**{previous.lstrip('-'): value})
+        condition |= clause
+    return condition
+
+
+class KeysetPage:
+    """
+    One page of a queryset ordered by unique sort keys. Moving between
+    pages seeks past the last row seen instead of using OFFSET, so every
+    page costs the same however deep it is or however large the table.
+    """
+
+    def __init__(self, items, ordering, params, has_next, has_previous):
+        self.items = items
+        self.ordering = ordering
+        self.params = params
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _url(self, direction, obj):
+        params = self.params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[direction] = encode_cursor([
+            _sort_value(obj, field.lstrip('-')) for field in self.ordering
+        ])
+        return '?' + params.urlencode()
+
+    @property
+    def next_url(self):
+        return self._url('after', self.items[-1]) if self.has_next and self.items else None
+
+    @property
+    def previous_url(self):
+        return self._url('before', self.items[0]) if self.has_previous and self.items else None
+
+
+def keyset_paginate(request, queryset, ordering, per_page=PER_PAGE):
+    """
+    Paginate `queryset` by `ordering` using the ?after= / ?before= cursor in
+    the request. The last ordering field must be unique (normally 'id').
+    """
+    ordering = list(ordering)
+    after = decode_cursor(request.GET.get('after', ''), len(ordering))
+    before = decode_cursor(request.GET.get('before', ''), len(ordering)) if after is None else None
+
+    try:
+        if before is not None:
+            reverse = [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+            rows = list(queryset.filter(seek_filter(ordering, before, backwards=True)).order_by(*reverse)[:per_page + 1])
+            has_previous = len(rows) > per_page
+            return KeysetPage(rows[:per_page][::-1], ordering, request.GET, True, has_previous)
+
+        if after is not None:
+            queryset = queryset.filter(seek_filter(ordering, after, backwards=False))
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    except (ValueError, ValidationError):
+        # A tampered cursor with values of the wrong type; start over
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+        after = None
+    return KeysetPage(rows[:per_page], ordering, request.GET, len(rows) > per_page, after is not None)
@@ -0,0 +1,125 @@
+import uuid
+
+from django.core.cache import cache
+
+from .models import CustomUser, StudentClass, TeacherSubject
+
+CACHE_TIMEOUT = 60 * 60
+SCOPE_VERSION_KEY = 'accounts:scope_version'
+
+
+def scope_version():
+    version = cache.get(SCOPE_VERSION_KEY)
+    if version is None:
+        # A random token, not a counter: if the key is evicted, a restart
+        # from 1 would bring entries cached under an old version back
+        version = uuid.uuid4().hex
+        if not cache.add(SCOPE_VERSION_KEY, version, None):
+            version = cache.get(SCOPE_VERSION_KEY, version)
+    return version
+
+
+def scope_key(user_id):
+    return f'accounts:scope:{scope_version()}:{user_id}'
+
+
+def invalidate_scopes():
+    """Any assignment change can widen or narrow many users' scopes; retire them all."""
+    # incr() is a get and a set on the file cache and would give the key a timeout
+    cache.set(SCOPE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _empty_scope():
+    return {
+        'pairs': set(),
+        'class_ids': set(),
+        'subject_ids': set(),
+        'student_ids': set(),
+        'teacher_ids': set(),
+        'class_students': {},
+        'student_classes': {},
+    }
+
+
+def compute_teacher_scope(teacher_id):
+    scope = _empty_scope()
+    scope['pairs'] = set(TeacherSubject.objects.filter(
+        teacher_id=teacher_id
+    ).values_list('class_assigned_id', 'subject_id'))
+    scope['class_ids'] = {class_id for class_id, _ in scope['pairs']}
+    scope['subject_ids'] = {subject_id for _, subject_id in scope['pairs']}
+
+    memberships = StudentClass.objects.filter(
+        class_assigned_id__in=scope['class_ids'],
+        student__user_type='student',
+    ).values_list('class_assigned_id', 'student_id')
+    for class_id, student_id in memberships:
+        scope['class_students'].setdefault(class_id, set()).add(student_id)
+        scope['student_classes'].setdefault(student_id, set()).add(class_id)
+    scope['student_ids'] = set(scope['student_classes'])
+    return scope
+
+
+def compute_student_scope(student_id):
+    scope = _empty_scope()
+    scope['class_ids'] = set(StudentClass.objects.filter(
+        student_id=student_id
+    ).values_list('class_assigned_id', flat=True))
+    assignments = TeacherSubject.objects.filter(
+        class_assigned_id__in=scope['class_ids'],
+        teacher__user_type='teacher',
+    ).values_list('class_assigned_id', 'subject_id', 'teacher_id')
+    for class_id, subject_id, teacher_id in assignments:
+        scope['pairs'].add((class_id, subject_id))
+        scope['subject_ids'].add(subject_id)
+        scope['teacher_ids'].add(teacher_id)
+    return scope
+
+
+def get_scope(user):
+    """
+    What a teacher or student may grade or comment on, as id sets:
+    'pairs' of (class, subject), their class, subject, student and teacher
+    ids, and class <-> student maps for teachers. Admins and unknown roles
+    get an empty scope.
+    """
+    if user.user_type not in ('teacher', 'student'):
+        return _empty_scope()
+    key = scope_key(user.id)
+    scope = cache.get(key)
+    if scope is None:
+        if user.user_type == 'teacher':
+            scope = compute_teacher_scope(user.id)
+        else:
+            scope = compute_student_scope(user.id)
+        cache.set(key, scope, CACHE_TIMEOUT)
+    return scope
+
+
+def subjects_for_student(scope, student_id):
+    """Subjects a teacher teaches in any of the student's classes."""
+    classes = scope['student_classes'].get(student_id, ())
+    return {subject_id for class_id, subject_id in scope['pairs'] if class_id in classes}
+
+
+def teaches(teacher_id, student_id, subject_id):
+    """
+    Whether the teacher teaches the subject in one of the student's classes.
+    Read from the database, not the cached scope, for checks that guard writes.
+    """
+    return TeacherSubject.objects.filter(
+        teacher_id=teacher_id,
+        subject_id=subject_id,
+        class_assigned_id__in=StudentClass.objects.filter(student_id=student_id).values('class_assigned_id'),
+    ).exists()
+
+
+def students_in_classes(class_ids):
+    """
+    Students enrolled in any of `class_ids`, as a subquery on the (few)
+    class ids rather than an IN list of every student id in the scope.
+    """
+    return CustomUser.objects.filter(
+        user_type='student',
+        id__in=StudentClass.objects.filter(class_assigned_id__in=class_ids).values('student_id'),
+    )
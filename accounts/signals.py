@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .dashboard import invalidate_class_subjects, invalidate_school_counts, invalidate_student_class
+from .scope import invalidate_scopes
+from .models import Class, CustomUser, StudentClass, Subject, TeacherSubject
+
+
+def _changes_profile(kwargs):
+    # Logins save only last_login; that should not throw the caches away
+    update_fields = kwargs.get('update_fields')
+    return update_fields is None or bool(set(update_fields) - {'last_login', 'password'})
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_caches(sender, instance, **kwargs):
+    if not _changes_profile(kwargs):
+        return
+    transaction.on_commit(invalidate_school_counts)
+    if kwargs.get('signal') is post_delete or not kwargs.get('created'):
+        # A deleted user, or one whose role changed, drops out of other users' scopes
+        transaction.on_commit(invalidate_scopes)
+    if instance.user_type == 'teacher':
+        # Teacher names and contact details appear on the class subject lists
+        transaction.on_commit(invalidate_class_subjects)
+
+
+@receiver(post_save, sender=Class)
+@receiver(post_delete, sender=Class)
+def invalidate_class_caches(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_school_counts)
+    if not kwargs.get('created'):
+        # Cached StudentClass rows carry the class name
+        student_ids = list(StudentClass.objects.filter(
+            class_assigned_id=instance.id
+        ).values_list('student_id', flat=True))
+        transaction.on_commit(lambda: invalidate_student_class(student_ids))
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def invalidate_subject_caches(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_school_counts)
+    transaction.on_commit(invalidate_class_subjects)
+
+
+@receiver(post_save, sender=TeacherSubject)
+@receiver(post_delete, sender=TeacherSubject)
+def invalidate_teacher_subject_caches(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_class_subjects)
+    transaction.on_commit(invalidate_scopes)
+
+
+@receiver(pre_save, sender=StudentClass)
+def remember_previous_assignment(sender, instance, **kwargs):
+    # An edited assignment may move to another student or class, whose caches are stale too
+    if instance.pk:
+        previous = StudentClass.objects.filter(pk=instance.pk).values_list('student_id', 'class_assigned_id').first()
+        if previous:
+            instance._previous_student_id, instance._previous_class_id = previous
+
+
+@receiver(post_save, sender=StudentClass)
+@receiver(post_delete, sender=StudentClass)
+def invalidate_student_class_caches(sender, instance, **kwargs):
+    student_ids = {instance.student_id, getattr(instance, '_previous_student_id', None)} - {None}
+    transaction.on_commit(lambda: invalidate_student_class(student_ids))
+    transaction.on_commit(invalidate_scopes)
@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from .autocomplete import people_matching, search_people
+from .models import CustomUser
+
+
+class SearchPeopleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number, (first_name, last_name) in enumerate([('Ronald', 'McDonald'), ('Ada', 'Bello'), ('Élodie', 'Durand')]):
+            CustomUser.objects.create_user(
+                email=f'student{number}@example.com', username=f'student{number}', password=None,
+                user_type='student', phone=1, first_name=first_name, last_name=last_name,
+            )
+
+    def names(self, term):
+        results = search_people(CustomUser.objects.filter(user_type='student'), term)['results']
+        return [result['text'].split(' (')[0] for result in results]
+
+    def test_matches_either_name_in_any_case(self):
+        self.assertEqual(self.names('mcd'), ['Ronald McDonald'])
+        self.assertEqual(self.names('BEL'), ['Ada Bello'])
+        self.assertEqual(self.names('élo'), ['Élodie Durand'])
+
+    def test_matches_first_and_last_name(self):
+        self.assertEqual(self.names('ron mcd'), ['Ronald McDonald'])
+        self.assertEqual(self.names('ron bel'), [])
+
+    def test_list_search_matches_name_or_email_prefix(self):
+        def emails(term):
+            return sorted(CustomUser.objects.filter(id__in=people_matching(term)).values_list('email', flat=True))
+        self.assertEqual(emails('mcd'), ['student0@example.com'])
+        self.assertEqual(emails('Student1@'), ['student1@example.com'])
+        self.assertEqual(emails('donald'), [])
@@ -35,4 +35,10 @@ urlpatterns = [
     path('student-assignments/edit/<int:assignment_id>/', views.edit_student_assignment, name='edit_student_assignment'),
     path('student-assignments/delete/<int:assignment_id>/', views.delete_student_assignment, name='delete_student_assignment'),
     path('assign-student/', views.assign_student_subject, name='assign_student_subject'),
+    
+    # Autocomplete (JSON)
+    path('autocomplete/students/', views.autocomplete_students, name='autocomplete_students'),
+    path('autocomplete/teachers/', views.autocomplete_teachers, name='autocomplete_teachers'),
+    path('autocomplete/classes/', views.autocomplete_classes, name='autocomplete_classes'),
+    path('autocomplete/subjects/', views.autocomplete_subjects, name='autocomplete_subjects'),
 ]
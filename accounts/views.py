@@ -2,9 +2,14 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
 from django.db.models import Q
 from django.db.models import Count
 from .models import CustomUser, Class, Subject, TeacherSubject, StudentClass, StudentSubject
+from .dashboard import get_class_subjects, get_school_counts, get_student_class
+from .pagination import keyset_paginate
+from .scope import get_scope, students_in_classes
+from .autocomplete import people_matching, search_named, search_people
 from .forms import CustomUserCreationForm, UserUpdateForm, ClassForm, SubjectForm, TeacherSubjectForm, StudentClassForm
 
 def login_view(request):
@@ -27,30 +32,20 @@ def custom_logout(request):
 def dashboard(request):
     context = {}
     if request.user.user_type == 'admin':
-        context.update({
-            'total_students': CustomUser.objects.filter(user_type='student').count(),
-            'total_teachers': CustomUser.objects.filter(user_type='teacher').count(),
-            'total_classes': Class.objects.count(),
-            'total_subjects': Subject.objects.count(),
-        })
+        # Cached; kept current by the signals in accounts.signals
+        context.update(get_school_counts())
     elif request.user.user_type == 'teacher':
         context.update({
-            'assigned_subjects': TeacherSubject.objects.filter(teacher=request.user),
+            'assigned_subjects': TeacherSubject.objects.filter(
+                teacher=request.user
+            ).select_related('subject', 'class_assigned'),
         })
     elif request.user.user_type == 'student':
-        try:
-            student_class = StudentClass.objects.get(student=request.user)
+        student_class = get_student_class(request.user.id)
+        context['student_class'] = student_class
+        if student_class:
             # Get all subjects taught in this class by any teacher
-            subjects_in_class = TeacherSubject.objects.filter(
-                class_assigned=student_class.class_assigned
-            ).select_related('subject').distinct()
-            
-            context.update({
-                'student_class': student_class,
-                'subjects_in_class': subjects_in_class,  # Changed from 'subjects'
-            })
-        except StudentClass.DoesNotExist:
-            context['student_class'] = None
+            context['subjects_in_class'] = get_class_subjects(student_class.class_assigned_id)
     
     return render(request, 'dashboard.html', context)
 
@@ -61,8 +56,24 @@ def manage_users(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    users = CustomUser.objects.all().order_by('-date_joined')
-    return render(request, 'admin/manage_users.html', {'users': users})
+    users = CustomUser.objects.all()
+    search = request.GET.get('q', '').strip()
+    if search:
+        # Prefix matches on the name and email indexes; a substring search would scan every user
+        users = users.filter(id__in=people_matching(search))
+    user_type = request.GET.get('user_type', '')
+    if user_type in dict(CustomUser.USER_TYPE_CHOICES):
+        users = users.filter(user_type=user_type)
+    
+    # Newest first; ids grow with date_joined and are already indexed
+    page = keyset_paginate(request, users, ['-id'])
+    return render(request, 'admin/manage_users.html', {
+        'users': page,
+        'page': page,
+        'search': search,
+        'user_type': user_type,
+        'user_types': CustomUser.USER_TYPE_CHOICES,
+    })
 
 @login_required
 def add_user(request):
@@ -119,8 +130,13 @@ def manage_classes(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    classes = Class.objects.all().order_by('name')
-    return render(request, 'admin/manage_classes.html', {'classes': classes})
+    classes = Class.objects.all()
+    search = request.GET.get('q', '').strip()
+    if search:
+        classes = classes.filter(name__icontains=search)
+    
+    page = keyset_paginate(request, classes, ['name', 'id'])
+    return render(request, 'admin/manage_classes.html', {'classes': page, 'page': page, 'search': search})
 
 @login_required
 def add_class(request):
@@ -181,8 +197,13 @@ def manage_subjects(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    subjects = Subject.objects.all().order_by('name')
-    return render(request, 'admin/manage_subjects.html', {'subjects': subjects})
+    subjects = Subject.objects.all()
+    search = request.GET.get('q', '').strip()
+    if search:
+        subjects = subjects.filter(Q(name__icontains=search) | Q(code__icontains=search))
+    
+    page = keyset_paginate(request, subjects, ['name', 'id'])
+    return render(request, 'admin/manage_subjects.html', {'subjects': page, 'page': page, 'search': search})
 
 @login_required
 def add_subject(request):
@@ -365,8 +386,26 @@ def manage_student_assignments(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    assignments = StudentClass.objects.all().order_by('student__first_name')
-    return render(request, 'admin/manage_student_assignments.html', {'assignments': assignments})
+    # The user_type filter lets the database walk the student name index
+    # instead of sorting every assignment
+    assignments = StudentClass.objects.filter(
+        student__user_type='student'
+    ).select_related('student', 'class_assigned')
+    search = request.GET.get('q', '').strip()
+    if search:
+        assignments = assignments.filter(student_id__in=people_matching(search))
+    class_id = request.GET.get('class_id', '')
+    if class_id.isdigit():
+        assignments = assignments.filter(class_assigned_id=class_id)
+    
+    page = keyset_paginate(request, assignments, ['student__first_name', 'student__last_name', 'id'])
+    return render(request, 'admin/manage_student_assignments.html', {
+        'assignments': page,
+        'page': page,
+        'search': search,
+        'class_id': class_id,
+        'classes': Class.objects.order_by('name'),
+    })
 
 @login_required
 def edit_student_assignment(request, assignment_id):
@@ -438,4 +477,59 @@ def assign_student_subject(request):
     
     # For GET request, show form to select student and class only
     form = StudentClassForm()
-    return render(request, 'admin/assign_student_subject.html', {'form': form})
\ No newline at end of file
+    return render(request, 'admin/assign_student_subject.html', {'form': form})
+
+
+# Autocomplete endpoints behind the AutocompleteSelect widgets, in select2's format
+def _autocomplete_denied():
+    return JsonResponse({'error': 'Access denied'}, status=403)
+
+
+@login_required
+def autocomplete_students(request):
+    user = request.user
+    if user.user_type not in ('admin', 'teacher'):
+        return _autocomplete_denied()
+    
+    students = CustomUser.objects.filter(user_type='student')
+    class_ids = None
+    if user.user_type == 'teacher':
+        class_ids = get_scope(user)['class_ids']
+    class_id = request.GET.get('class', '')
+    if class_id.isdigit():
+        class_ids = {int(class_id)} & class_ids if class_ids is not None else {int(class_id)}
+    if class_ids is not None:
+        students = students_in_classes(class_ids)
+    
+    return JsonResponse(search_people(students, request.GET.get('q', ''), request.GET.get('after', '')))
+
+
+@login_required
+def autocomplete_teachers(request):
+    user = request.user
+    if user.user_type not in ('admin', 'student'):
+        return _autocomplete_denied()
+    
+    teachers = CustomUser.objects.filter(user_type='teacher')
+    if user.user_type == 'student':
+        teachers = teachers.filter(id__in=get_scope(user)['teacher_ids'])
+    
+    return JsonResponse(search_people(teachers, request.GET.get('q', ''), request.GET.get('after', '')))
+
+
+@login_required
+def autocomplete_classes(request):
+    classes = Class.objects.all()
+    if request.user.user_type != 'admin':
+        classes = classes.filter(id__in=get_scope(request.user)['class_ids'])
+    
+    return JsonResponse(search_named(classes, request.GET.get('q', ''), request.GET.get('after', '')))
+
+
+@login_required
+def autocomplete_subjects(request):
+    subjects = Subject.objects.all()
+    if request.user.user_type != 'admin':
+        subjects = subjects.filter(id__in=get_scope(request.user)['subject_ids'])
+    
+    return JsonResponse(search_named(subjects, request.GET.get('q', ''), request.GET.get('after', ''), code=True))
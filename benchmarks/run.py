@@ -0,0 +1,250 @@
+"""
+Benchmark the main views and ORM paths against a synthetic school.
+
+    python benchmarks/run.py --students 2000 --classes 20 --iterations 20
+    python benchmarks/run.py --compare benchmarks/results/<old>.json
+
+Every case is profiled once for query count and peak Python memory
+(tracemalloc) and then timed over --iterations runs with the Django test
+client. Results are written as JSON so runs on different commits can be
+compared with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--subjects', type=int, default=8)
+    parser.add_argument('--teachers', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--only', action='append', default=[], help='Run only cases whose name contains this text')
+    parser.add_argument('--db', help='SQLite file to benchmark against (recreated unless --reuse-db)')
+    parser.add_argument('--reuse-db', action='store_true', help='Keep an already seeded database file')
+    parser.add_argument('--output', help='JSON file to write (default: benchmarks/results/<time>_<commit>.json)')
+    parser.add_argument('--compare', help='Earlier JSON result to compare against')
+    return parser.parse_args()
+
+
+def setup_django(args):
+    sys.path.insert(0, str(REPO_ROOT))
+    if args.db:
+        os.environ['BENCH_DB'] = str(Path(args.db).resolve())
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    db_path = Path(settings.DATABASES['default']['NAME'])
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    fresh = not (args.reuse_db and db_path.exists())
+    if fresh:
+        db_path.unlink(missing_ok=True)
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    if fresh:
+        from grades.seeding import seed_school
+
+        start = time.perf_counter()
+        seed_school(
+            students=args.students, classes=args.classes, subjects=args.subjects,
+            teachers=args.teachers, seed=args.seed,
+        )
+        print(f'Seeded {args.students} students in {time.perf_counter() - start:.1f}s')
+    return db_path
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class Case:
+    def __init__(self, name, run, before=None):
+        self.name = name
+        self.run = run
+        self.before = before
+
+
+def request_case(name, client, method, url, data=None, expect=200, before=None):
+    def run():
+        response = getattr(client, method)(url, data or {})
+        if response.status_code != expect:
+            raise AssertionError(f'{name}: expected {expect}, got {response.status_code}')
+        if response.streaming:
+            b''.join(response.streaming_content)
+            response.close()
+        return response
+    return Case(name, run, before)
+
+
+def build_cases():
+    from django.test import Client
+
+    from accounts.models import CustomUser, TeacherSubject
+    from grades.models import Grade, StudentResult
+    from grades.results import recompute_results
+    from grades.transcript_cache import purge
+
+    admin = CustomUser.objects.filter(user_type='admin').order_by('id').first()
+    assignment = TeacherSubject.objects.select_related('teacher', 'subject', 'class_assigned').order_by('id').first()
+    teacher = assignment.teacher
+    student = CustomUser.objects.filter(
+        user_type='student', studentclass__class_assigned=assignment.class_assigned
+    ).order_by('id').first()
+
+    clients = {}
+    for role, user in (('admin', admin), ('teacher', teacher), ('student', student)):
+        clients[role] = Client()
+        clients[role].force_login(user)
+
+    def reset_grade():
+        # add_grade must create the grade each time; undo the last run outside the timing
+        Grade.objects.filter(student=student, subject=assignment.subject).delete()
+        recompute_results([student.id])
+
+    result = StudentResult.objects.get(student=student)
+
+    cases = [
+        request_case(f'dashboard[{role}]', clients[role], 'get', '/dashboard/')
+        for role in ('admin', 'teacher', 'student')
+    ]
+    cases += [
+        request_case('teacher_grades', clients['teacher'], 'get', '/grades/teacher/'),
+        request_case('admin_student_results', clients['admin'], 'get', '/grades/admin/results/'),
+        request_case(
+            'add_grade[POST]', clients['teacher'], 'post', '/grades/teacher/add/',
+            {'student': student.id, 'subject': assignment.subject_id, 'test_score': '30', 'exam_score': '45'},
+            expect=302, before=reset_grade,
+        ),
+        request_case('download_result_pdf[cold]', clients['student'], 'get', '/grades/student/download-pdf/',
+                     before=lambda: purge()),
+        request_case('download_result_pdf[warm]', clients['student'], 'get', '/grades/student/download-pdf/'),
+        request_case('admin_download_student_pdf[cold]', clients['admin'], 'get',
+                     f'/grades/admin/student/{student.id}/download-pdf/', before=lambda: purge()),
+        request_case('admin_download_student_pdf[warm]', clients['admin'], 'get',
+                     f'/grades/admin/student/{student.id}/download-pdf/'),
+        Case('StudentResult.calculate_result', result.calculate_result),
+    ]
+    return cases
+
+
+def measure(case, iterations, warmup):
+    from django.db import connection
+
+    from grading_system.middleware import QueryRecorder
+
+    for _ in range(warmup):
+        if case.before:
+            case.before()
+        case.run()
+
+    # Profile pass: queries and peak memory, kept out of the timings
+    if case.before:
+        case.before()
+    recorder = QueryRecorder(keep_sql=False)
+    tracemalloc.start()
+    with connection.execute_wrapper(recorder):
+        case.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        if case.before:
+            case.before()
+        start = time.perf_counter()
+        case.run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': recorder.count,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())['results']
+    print(f"\n{'case':40} {'median ms':>22} {'queries':>12}")
+    for name, row in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = (row['median_ms'] - old['median_ms']) / old['median_ms'] * 100 if old['median_ms'] else 0
+        print(
+            f"{name:40} {old['median_ms']:8.2f} -> {row['median_ms']:8.2f} ({change:+5.0f}%)"
+            f" {old['queries']:4} -> {row['queries']:<4}"
+        )
+
+
+def main():
+    args = parse_args()
+    db_path = setup_django(args)
+
+    import django
+
+    results = {}
+    print(f"{'case':40} {'median ms':>10} {'p95 ms':>10} {'queries':>8} {'peak KiB':>10}")
+    for case in build_cases():
+        if args.only and not any(text in case.name for text in args.only):
+            continue
+        row = measure(case, args.iterations, args.warmup)
+        results[case.name] = row
+        print(f"{case.name:40} {row['median_ms']:10.2f} {row['p95_ms']:10.2f} {row['queries']:8} {row['peak_memory_kb']:10.1f}")
+
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    output = Path(args.output) if args.output else (
+        REPO_ROOT / 'benchmarks' / 'results' / f"{started:%Y%m%dT%H%M%S}_{commit}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'commit': commit,
+        'timestamp': started.isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': str(db_path),
+        'scale': {
+            'students': args.students, 'classes': args.classes, 'subjects': args.subjects,
+            'teachers': args.teachers, 'seed': args.seed,
+        },
+        'results': results,
+    }, indent=2))
+    print(f'\nWrote {output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
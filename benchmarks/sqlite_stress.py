@@ -0,0 +1,215 @@
+"""
+Concurrent grade writes and result reads against SQLite, with and without the pragma layer.
+
+    python benchmarks/sqlite_stress.py --writers 4 --readers 4 --seconds 10
+    python benchmarks/sqlite_stress.py --reuse-db --only tuned
+
+Each configuration gets its own copy of one seeded database and the same
+workload. Writer processes update random grades the way edit_grade does
+(the Grade save and the StudentResult delta in one transaction). Reader
+processes load a random student's results page queries.
+
+- baseline: SQLite's stock behaviour. It uses the rollback journal,
+  synchronous=FULL, the 5 second busy timeout Python's sqlite3 module
+  sets, and deferred transactions.
+- pragmas: the project's SQLITE_PRAGMAS with WAL (SQLITE_WAL=1) and
+  deferred transactions.
+- tuned: the same pragmas with SQLITE_TRANSACTION_MODE, as configured.
+
+Lock errors are "database is locked" failures a request would have
+turned into a 500.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+from run import REPO_ROOT, git_commit, setup_django
+
+STOCK_PRAGMAS = {
+    'journal_mode': 'delete', 'synchronous': 'full', 'busy_timeout': None,
+    'mmap_size': None, 'cache_size': None, 'temp_store': None,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--subjects', type=int, default=8)
+    parser.add_argument('--teachers', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--only', action='append', default=[], help='Run only configurations with this name')
+    parser.add_argument('--db', help='SQLite file to seed (recreated unless --reuse-db)')
+    parser.add_argument('--reuse-db', action='store_true', help='Keep an already seeded database file')
+    parser.add_argument('--output', help='JSON file to write (default: benchmarks/results/sqlite_stress_<time>_<commit>.json)')
+    return parser.parse_args()
+
+
+def build_configs():
+    """{name: (pragmas, transaction mode)}, read from the project settings."""
+    from grading_system.sqlite import sqlite_pragmas, transaction_mode
+
+    pragmas = {**STOCK_PRAGMAS, **sqlite_pragmas(wal=True)}
+    return {
+        'baseline': (STOCK_PRAGMAS, None),
+        'pragmas': (pragmas, None),
+        'tuned': (pragmas, transaction_mode()),
+    }
+
+
+def worker(role, db_path, pragmas, mode, seconds, seed, ready, go, results):
+    """One writer or reader process; puts its counts and latencies on `results`."""
+    sys.path.insert(0, str(REPO_ROOT))
+    os.environ['BENCH_DB'] = db_path
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.SQLITE_PRAGMAS = pragmas
+    settings.SQLITE_TRANSACTION_MODE = mode
+
+    from django.db import OperationalError, connection, transaction
+
+    from grades.models import Grade, StudentResult
+
+    rng = random.Random(seed)
+    grade_ids = list(Grade.objects.values_list('id', flat=True))
+    student_ids = list(Grade.objects.values_list('student_id', flat=True).distinct())
+    connection.close()
+    ready.put(role)
+    go.wait()
+
+    done = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == 'writer':
+                with transaction.atomic():
+                    grade = Grade.objects.get(id=rng.choice(grade_ids))
+                    grade.test_score = Decimal(rng.randint(0, 40))
+                    grade.exam_score = Decimal(rng.randint(0, 60))
+                    grade.save()
+            else:
+                student_id = rng.choice(student_ids)
+                list(Grade.objects.filter(student_id=student_id).select_related('subject', 'teacher'))
+                StudentResult.objects.filter(student_id=student_id).first()
+        except OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            errors += 1
+        else:
+            done += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+        # Each request opens its own connection (CONN_MAX_AGE = 0)
+        connection.close()
+    results.put((role, done, errors, latencies))
+
+
+def run_config(name, pragmas, mode, source, args):
+    db_path = source.with_name(f'{source.stem}_{name}{source.suffix}')
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{db_path}{suffix}').unlink(missing_ok=True)
+    shutil.copyfile(source, db_path)
+    # Switch the copy's journal mode before the workers open it; the mode is kept in the file
+    with closing(sqlite3.connect(db_path)) as db:
+        db.execute(f"PRAGMA journal_mode = {pragmas['journal_mode']}")
+
+    context = multiprocessing.get_context('spawn')
+    ready, results, go = context.Queue(), context.Queue(), context.Event()
+    roles = ['writer'] * args.writers + ['reader'] * args.readers
+    processes = [
+        context.Process(target=worker, args=(role, str(db_path), pragmas, mode, args.seconds, args.seed + number,
+                                             ready, go, results))
+        for number, role in enumerate(roles)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        # A worker that fails to start never reports; don't wait for it forever
+        ready.get(timeout=120)
+    go.set()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    summary = {}
+    for role in ('writer', 'reader'):
+        rows = [row for row in collected if row[0] == role]
+        latencies = sorted(latency for row in rows for latency in row[3])
+        done = sum(row[1] for row in rows)
+        summary[role + 's'] = {
+            'processes': len(rows),
+            'completed': done,
+            'per_second': round(done / args.seconds, 1),
+            'lock_errors': sum(row[2] for row in rows),
+            'median_ms': round(statistics.median(latencies), 2) if latencies else None,
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2) if latencies else None,
+        }
+    return summary
+
+
+def main():
+    args = parse_args()
+    source = setup_django(args)
+
+    import django
+    from django.db import connection
+
+    configs = build_configs()
+    # Fold any WAL back into the file so a plain copy carries every row
+    connection.close()
+
+    results = {}
+    print(f"{'config':10} {'writes/s':>9} {'write errors':>13} {'write p95':>10} {'reads/s':>9} {'read errors':>12} {'read p95':>9}")
+    for name, (pragmas, mode) in configs.items():
+        if args.only and name not in args.only:
+            continue
+        summary = run_config(name, pragmas, mode, source, args)
+        results[name] = {'pragmas': pragmas, 'transaction_mode': mode, **summary}
+        writers, readers = summary['writers'], summary['readers']
+        print(
+            f"{name:10} {writers['per_second']:9.1f} {writers['lock_errors']:13} {writers['p95_ms'] or 0:10.2f}"
+            f" {readers['per_second']:9.1f} {readers['lock_errors']:12} {readers['p95_ms'] or 0:9.2f}"
+        )
+
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    output = Path(args.output) if args.output else (
+        REPO_ROOT / 'benchmarks' / 'results' / f"sqlite_stress_{started:%Y%m%dT%H%M%S}_{commit}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'commit': commit,
+        'timestamp': started.isoformat(),
+        'django': django.get_version(),
+        'database': str(source),
+        'scale': {
+            'students': args.students, 'classes': args.classes, 'subjects': args.subjects,
+            'teachers': args.teachers, 'seed': args.seed,
+        },
+        'workload': {'writers': args.writers, 'readers': args.readers, 'seconds': args.seconds},
+        'results': results,
+    }, indent=2))
+    print(f'\nWrote {output}')
+
+
+if __name__ == '__main__':
+    main()
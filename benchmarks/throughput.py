@@ -0,0 +1,226 @@
+"""
+Compare concurrent-request throughput of the WSGI and ASGI entry points.
+
+    python benchmarks/throughput.py --students 2000 --concurrency 1 8 32
+    python benchmarks/throughput.py --reuse-db --only dashboard
+
+Both applications are called in-process, without a server in front, so the
+numbers cover Django's handler, the middleware and the views. WSGI
+requests run `concurrency` at a time on a thread pool, like a threaded
+worker, and reach the sync views. ASGI requests run `concurrency` at a
+time as tasks on one event loop, like a single uvicorn worker, and reach
+the async views that grading_system.asgi_urls swaps in. Every request carries a real session
+cookie, and both sides read the same database and the same warm caches.
+"""
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from run import REPO_ROOT, git_commit, setup_django
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--subjects', type=int, default=8)
+    parser.add_argument('--teachers', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=400, help='Requests per case and concurrency level')
+    parser.add_argument('--only', action='append', default=[], help='Run only cases whose name contains this text')
+    parser.add_argument('--db', help='SQLite file to benchmark against (recreated unless --reuse-db)')
+    parser.add_argument('--reuse-db', action='store_true', help='Keep an already seeded database file')
+    parser.add_argument('--output', help='JSON file to write (default: benchmarks/results/throughput_<time>_<commit>.json)')
+    return parser.parse_args()
+
+
+def session_cookie(user):
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    return f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+
+def build_cases():
+    from django.urls import reverse
+
+    from accounts.models import CustomUser, TeacherSubject
+
+    admin = CustomUser.objects.filter(user_type='admin').order_by('id').first()
+    assignment = TeacherSubject.objects.select_related('teacher', 'class_assigned').order_by('id').first()
+    student = CustomUser.objects.filter(
+        user_type='student', studentclass__class_assigned=assignment.class_assigned
+    ).order_by('id').first()
+    cookies = {
+        'admin': session_cookie(admin),
+        'teacher': session_cookie(assignment.teacher),
+        'student': session_cookie(student),
+    }
+    cases = [(f'dashboard[{role}]', reverse('dashboard'), cookies[role]) for role in ('admin', 'teacher', 'student')]
+    cases += [
+        ('student_results', reverse('student_results'), cookies['student']),
+        ('subject_grades', reverse('subject_grades', args=[assignment.subject_id]), cookies['student']),
+        ('admin_student_grades', reverse('admin_student_grades', args=[student.id]), cookies['admin']),
+    ]
+    return cases
+
+
+def wsgi_get(application, path, cookie):
+    """One GET through the WSGI application; returns the status code."""
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie, 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        for _ in body:
+            pass
+    finally:
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_get(application, path, cookie):
+    """One GET through the ASGI application; returns the status code."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    finished = asyncio.Event()
+    sent_request = False
+    status = []
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django listens for a disconnect while it responds; the client hangs up afterwards
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await application(scope, receive, send)
+    finished.set()
+    return status[0]
+
+
+def summarise(latencies, elapsed):
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'median_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2),
+    }
+
+
+def run_wsgi(application, path, cookie, concurrency, total):
+    from django.db import connections
+
+    def one(_):
+        start = time.perf_counter()
+        status = wsgi_get(application, path, cookie)
+        if status != 200:
+            raise AssertionError(f'WSGI {path}: expected 200, got {status}')
+        return (time.perf_counter() - start) * 1000
+
+    def close(_):
+        connections.close_all()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - start
+        list(pool.map(close, range(concurrency)))
+    return summarise(latencies, elapsed)
+
+
+async def run_asgi(application, path, cookie, concurrency, total):
+    remaining = iter(range(total))
+    latencies = []
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            status = await asgi_get(application, path, cookie)
+            if status != 200:
+                raise AssertionError(f'ASGI {path}: expected 200, got {status}')
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarise(latencies, time.perf_counter() - start)
+
+
+def main():
+    args = parse_args()
+    db_path = setup_django(args)
+
+    import django
+    from django.core.handlers.wsgi import WSGIHandler
+
+    from grading_system.asgi import application as asgi_application
+
+    wsgi_application = WSGIHandler()
+    results = {}
+    print(f"{'case':26} {'conc':>5} {'WSGI req/s':>11} {'ASGI req/s':>11} {'WSGI p95':>9} {'ASGI p95':>9}")
+    for name, path, cookie in build_cases():
+        if args.only and not any(text in name for text in args.only):
+            continue
+        # Warm the caches and the first-request imports for both handlers
+        run_wsgi(wsgi_application, path, cookie, 1, 2)
+        asyncio.run(run_asgi(asgi_application, path, cookie, 1, 2))
+        for concurrency in args.concurrency:
+            wsgi = run_wsgi(wsgi_application, path, cookie, concurrency, args.requests)
+            asgi = asyncio.run(run_asgi(asgi_application, path, cookie, concurrency, args.requests))
+            results[f'{name}@{concurrency}'] = {'wsgi': wsgi, 'asgi': asgi}
+            print(
+                f"{name:26} {concurrency:5} {wsgi['requests_per_second']:11.1f} {asgi['requests_per_second']:11.1f}"
+                f" {wsgi['p95_ms']:9.2f} {asgi['p95_ms']:9.2f}"
+            )
+
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    output = Path(args.output) if args.output else (
+        REPO_ROOT / 'benchmarks' / 'results' / f"throughput_{started:%Y%m%dT%H%M%S}_{commit}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'commit': commit,
+        'timestamp': started.isoformat(),
+        'django': django.get_version(),
+        'database': str(db_path),
+        'scale': {
+            'students': args.students, 'classes': args.classes, 'subjects': args.subjects,
+            'teachers': args.teachers, 'seed': args.seed,
+        },
+        'results': results,
+    }, indent=2))
+    print(f'\nWrote {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Grade, Comment, StudentResult, SchoolSettings
+from django.shortcuts import redirect
+from .models import Grade, Comment, CommentCounter, StudentResult, SchoolSettings, ClassSubjectStats, Job
 
 
 @admin.register(Grade)
@@ -10,19 +11,49 @@ class GradeAdmin(admin.ModelAdmin):
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ['sender', 'receiver', 'subject', 'comment_type', 'created_at']
+    list_display = ['sender', 'receiver', 'subject', 'comment_type', 'created_at', 'read_at']
     list_filter = ['comment_type', 'created_at']
     search_fields = ['sender__first_name', 'receiver__first_name', 'subject__name']
 
+@admin.register(CommentCounter)
+class CommentCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'received', 'unread', 'sent', 'updated_at']
+    search_fields = ['user__first_name', 'user__last_name', 'user__email']
+    readonly_fields = ['received', 'unread', 'sent', 'updated_at']
+
 @admin.register(StudentResult)
 class StudentResultAdmin(admin.ModelAdmin):
     list_display = ['student', 'total_subjects', 'average_score', 'updated_at']
     list_filter = ['academic_year']
     search_fields = ['student__first_name', 'student__last_name']
+    actions = ['download_transcripts']
+
+    @admin.action(description='Download transcripts for selected students (ZIP)')
+    def download_transcripts(self, request, queryset):
+        from .jobs import enqueue
+
+        # Rendering runs in a worker (run_workers); the job page links to the ZIP when it is ready
+        job = enqueue('batch_transcripts', {
+            'student_ids': sorted(set(queryset.values_list('student_id', flat=True))),
+            'label': 'selected students',
+        }, user=request.user)
+        self.message_user(request, 'Transcript generation queued')
+        return redirect('job_detail', job_id=job.id)
+
+@admin.register(ClassSubjectStats)
+class ClassSubjectStatsAdmin(admin.ModelAdmin):
+    list_display = ['class_assigned', 'subject', 'student_count', 'mean_score', 'median_score', 'std_dev', 'updated_at']
+    list_filter = ['class_assigned', 'subject']
 
 
 @admin.register(SchoolSettings)
 class SchoolSettingsAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # Only allow one settings instance
-        return not SchoolSettings.objects.exists()
\ No newline at end of file
+        return not SchoolSettings.objects.exists()
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'worker', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['result', 'error', 'output_path', 'attempts', 'worker', 'started_at', 'heartbeat_at', 'finished_at']
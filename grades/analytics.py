@@ -0,0 +1,120 @@
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from accounts.models import Subject
+from .models import Grade
+
+PASS_MARK = getattr(settings, 'GRADES_PASS_MARK', 50)
+DISTRIBUTION_STEP = 10
+REPORT_CACHE_KEY = 'grades:school_report'
+REPORT_CACHE_TIMEOUT = 15 * 60
+
+
+def load_grade_arrays(queryset=None):
+    """
+    Pull the Grade columns once into NumPy arrays. Scores are cast to float
+    in SQL so no Decimal objects are built per row.
+    """
+    queryset = Grade.objects.all() if queryset is None else queryset
+    rows = queryset.annotate(
+        test_f=Cast('test_score', FloatField()),
+        exam_f=Cast('exam_score', FloatField()),
+        total_f=Cast('total_score', FloatField()),
+    ).values_list('subject_id', 'test_f', 'exam_f', 'total_f')
+
+    data = np.array(list(rows), dtype=np.float64).reshape(-1, 4)
+    return {
+        'subject_ids': data[:, 0].astype(np.int64),
+        'test_scores': data[:, 1],
+        'exam_scores': data[:, 2],
+        'total_scores': data[:, 3],
+    }
+
+
+def grade_distribution(total_scores, step=DISTRIBUTION_STEP):
+    """Histogram of total scores in fixed-width bands starting at 0."""
+    upper = max(100.0, float(total_scores.max()) if total_scores.size else 0.0)
+    edges = np.arange(0, upper + step, step, dtype=np.float64)
+    counts, edges = np.histogram(total_scores, bins=edges)
+    return [
+        {'low': int(edges[i]), 'high': int(edges[i + 1]), 'count': int(counts[i])}
+        for i in range(len(counts))
+    ]
+
+
+def z_scores(values):
+    std = values.std()
+    if values.size == 0 or std == 0:
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+
+def score_correlation(test_scores, exam_scores):
+    """Pearson correlation between test and exam scores, or None if undefined."""
+    if test_scores.size < 2 or test_scores.std() == 0 or exam_scores.std() == 0:
+        return None
+    return float(np.corrcoef(test_scores, exam_scores)[0, 1])
+
+
+def subject_summary(subject_ids, total_scores, pass_mark=PASS_MARK):
+    """Per-subject count, mean and pass rate using a single grouping pass."""
+    if subject_ids.size == 0:
+        return {}
+    unique_ids, groups = np.unique(subject_ids, return_inverse=True)
+    counts = np.bincount(groups)
+    sums = np.bincount(groups, weights=total_scores)
+    passes = np.bincount(groups, weights=(total_scores >= pass_mark).astype(np.float64))
+    return {
+        int(subject_id): {
+            'count': int(counts[i]),
+            'mean': float(sums[i] / counts[i]),
+            'pass_rate': float(passes[i] / counts[i] * 100),
+        }
+        for i, subject_id in enumerate(unique_ids)
+    }
+
+
+def school_report(arrays=None, pass_mark=PASS_MARK):
+    """Compute the school-wide analytics report from the Grade table."""
+    arrays = load_grade_arrays() if arrays is None else arrays
+    totals = arrays['total_scores']
+    if totals.size == 0:
+        return {'count': 0, 'subjects': [], 'distribution': []}
+
+    zs = z_scores(totals)
+    subject_names = dict(Subject.objects.values_list('id', 'name'))
+    subjects = [
+        dict(summary, id=subject_id, name=subject_names.get(subject_id, ''))
+        for subject_id, summary in subject_summary(arrays['subject_ids'], totals, pass_mark).items()
+    ]
+    subjects.sort(key=lambda row: row['name'])
+
+    return {
+        'count': int(totals.size),
+        'mean': float(totals.mean()),
+        'median': float(np.median(totals)),
+        'std_dev': float(totals.std()),
+        'min': float(totals.min()),
+        'max': float(totals.max()),
+        'pass_mark': pass_mark,
+        'pass_rate': float((totals >= pass_mark).mean() * 100),
+        'outliers': int((np.abs(zs) > 2).sum()),
+        'test_exam_correlation': score_correlation(arrays['test_scores'], arrays['exam_scores']),
+        'distribution': grade_distribution(totals),
+        'subjects': subjects,
+    }
+
+
+def get_cached_school_report():
+    report = cache.get(REPORT_CACHE_KEY)
+    if report is None:
+        report = school_report()
+        cache.set(REPORT_CACHE_KEY, report, REPORT_CACHE_TIMEOUT)
+    return report
+
+
+def invalidate_school_report():
+    cache.delete(REPORT_CACHE_KEY)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class GradesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'grades'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from grading_system import sqlite  # noqa: F401
@@ -0,0 +1,90 @@
+"""
+Async versions of the read-heavy grade views, served only by the ASGI
+application (grading_system.asgi_urls). Under WSGI the sync views in
+grades.views are used: there an async view only adds an event loop per
+request.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import Http404
+from django.shortcuts import redirect, render
+
+from accounts.decorators import async_login_required
+from accounts.models import CustomUser, Subject
+from .models import Grade, StudentResult
+from .ranking import aget_student_positions
+
+
+@async_login_required
+async def student_results(request):
+    if request.user.user_type !='student':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    grades = [
+        grade async for grade in Grade.objects.filter(
+            student=request.user,
+        ).select_related('subject', 'teacher').order_by('subject__name')
+    ]
+    student_result, created = await StudentResult.objects.aget_or_create(student=request.user)
+    if created or not grades:
+        await sync_to_async(student_result.calculate_result)()
+    
+    # Positions come from the cached per-class ranking
+    positions = await aget_student_positions(request.user.id)
+    if positions:
+        for grade in grades:
+            grade.position = positions['subjects'].get(grade.subject_id)
+    
+    return render(request, 'grades/student_results.html', {
+        'grades': grades,
+        'student_result': student_result,
+        'positions': positions
+    })
+
+
+@async_login_required
+async def admin_student_grades(request, student_id):
+    if request.user.user_type != 'admin':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    try:
+        student = await CustomUser.objects.aget(id=student_id, user_type='student')
+    except CustomUser.DoesNotExist:
+        raise Http404
+    grades = [
+        grade async for grade in Grade.objects.filter(
+            student=student,
+        ).select_related('subject', 'teacher').order_by('subject__name')
+    ]
+    student_result = await StudentResult.objects.filter(student=student).afirst() or StudentResult(student=student)
+    
+    return render(request, 'grades/admin_student_grades.html', {
+        'student': student,
+        'grades': grades,
+        'student_result': student_result
+    })
+
+
+@async_login_required
+async def subject_grades(request, subject_id):
+    if request.user.user_type not in ['student', 'admin']:
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    try:
+        subject = await Subject.objects.aget(id=subject_id)
+    except Subject.DoesNotExist:
+        raise Http404
+    grades = [
+        grade async for grade in Grade.objects.filter(
+            student=request.user,
+            subject=subject
+        ).order_by('-created_at')
+    ]
+    
+    return render(request, 'grades/subject_grades.html', {
+        'subject': subject,
+        'grades': grades
+    })
@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from .analytics import invalidate_school_report
+from .models import Grade
+from .results import recompute_results
+from .stats import refresh_stats_for_grades
+
+GRADE_UPSERT_FIELDS = ['teacher', 'test_score', 'exam_score', 'total_score', 'updated_at']
+
+
+def upsert_grades(grades, batch_size=1000):
+    """
+    Insert or update unsaved Grade instances on the (student, subject) key
+    with bulk_create. Grade.save() is bypassed, so total_score is filled in
+    here. Signals don't fire either; call refresh_after_grade_writes().
+    """
+    for grade in grades:
+        grade.total_score = grade.test_score + grade.exam_score
+
+    Grade.objects.bulk_create(
+        grades,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['student', 'subject'],
+        update_fields=GRADE_UPSERT_FIELDS,
+    )
+    return len(grades)
+
+
+def refresh_after_grade_writes(student_subject_pairs):
+    """Bring results, statistics and cached reports up to date after a bulk write."""
+    student_subject_pairs = set(student_subject_pairs)
+    if not student_subject_pairs:
+        return
+    recompute_results({student_id for student_id, _ in student_subject_pairs})
+    refresh_stats_for_grades(student_subject_pairs)
+    transaction.on_commit(invalidate_school_report)
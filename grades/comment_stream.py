@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+import json
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+
+from .inbox import comment_payload
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+POLL_BATCH = 500
+RETRY_MS = 5000
+
+
+def poll_interval():
+    return getattr(settings, 'COMMENT_STREAM_POLL_SECONDS', 5)
+
+
+def heartbeat_interval():
+    return getattr(settings, 'COMMENT_STREAM_HEARTBEAT_SECONDS', 15)
+
+
+def stream_lifetime():
+    return getattr(settings, 'COMMENT_STREAM_MAX_SECONDS', 300)
+
+
+def sse_event(payload, event='comment'):
+    return f"id: {payload['id']}\nevent: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _latest_comment_id():
+    return Comment.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _close_connection():
+    # Looked up in the worker thread; `connection` on the event loop is a different one
+    connection.close()
+
+
+def _comments_after(last_id):
+    comments = Comment.objects.filter(id__gt=last_id).select_related('sender', 'subject').order_by('id')
+    return [(comment.receiver_id, comment_payload(comment)) for comment in comments[:POLL_BATCH]]
+
+
+class CommentBroker:
+    """
+    In-process pub/sub that fans new comments out to the SSE streams open
+    in this process. A stream is an asyncio.Queue: while idle it is a
+    suspended coroutine and costs no thread, query or DB connection.
+
+    publish() is fed by post_save (after commit) and delivers straight
+    away. Comments saved by other processes -- WSGI workers, run_workers --
+    are found by one poller task per process, which reads rows past the
+    last id it has seen every COMMENT_STREAM_POLL_SECONDS, however many
+    streams are open. Streams drop ids they have already sent, so a comment
+    seen by both paths is delivered once.
+    """
+
+    def __init__(self):
+        self._queues = defaultdict(set)
+        self._loop = None
+        self._poller = None
+        self._ready = None
+
+    def is_running(self):
+        return self._poller is not None and not self._poller.done()
+
+    def publish(self, receiver_id, payload):
+        """Deliver a comment to the receiver's streams; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, receiver_id, payload)
+        except RuntimeError:
+            # The loop shut down between the check and the call
+            pass
+
+    def _deliver(self, receiver_id, payload):
+        for queue in self._queues.get(receiver_id, ()):
+            queue.put_nowait(payload)
+
+    async def subscribe(self, user_id):
+        """A queue that receives the user's new comments until unsubscribe()."""
+        queue = asyncio.Queue()
+        self._queues[user_id].add(queue)
+        self._start_poller()
+        await self._ready.wait()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._queues.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[user_id]
+
+    def _start_poller(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._poller is not None and not self._poller.done():
+            return
+        self._loop = loop
+        self._ready = asyncio.Event()
+        # Start from an empty context: the task must not inherit the request's
+        # thread-sensitive executor, which Django shuts down with the request
+        self._poller = contextvars.Context().run(loop.create_task, self._poll())
+
+    async def _poll(self):
+        try:
+            last_id = await sync_to_async(_latest_comment_id)()
+        except DatabaseError:
+            logger.exception('Could not start the comment poller')
+            return
+        finally:
+            # Waiting streams go ahead either way; their own queries report a dead database
+            self._ready.set()
+        while self._queues:
+            await asyncio.sleep(poll_interval())
+            try:
+                found = await sync_to_async(_comments_after)(last_id)
+            except DatabaseError:
+                logger.exception('Polling for new comments failed')
+                await sync_to_async(close_old_connections)()
+                continue
+            for receiver_id, payload in found:
+                last_id = payload['id']
+                self._deliver(receiver_id, payload)
+        self._poller = None
+
+
+comment_broker = CommentBroker()
+
+
+async def comment_events(user_id, after=None):
+    """
+    Server-sent events for comments received by `user_id`. With `after`
+    (a comment id, normally the browser's Last-Event-ID) missed comments
+    are replayed first. The stream ends after COMMENT_STREAM_MAX_SECONDS;
+    EventSource then reconnects from the last id it saw.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + stream_lifetime()
+    queue = await comment_broker.subscribe(user_id)
+    try:
+        seen = set()
+        if after is None:
+            after = await Comment.objects.filter(receiver_id=user_id).order_by('-id').values_list(
+                'id', flat=True
+            ).afirst() or 0
+        else:
+            missed = Comment.objects.filter(receiver_id=user_id, id__gt=after).select_related(
+                'sender', 'subject'
+            ).order_by('id')[:POLL_BATCH]
+            async for comment in missed:
+                seen.add(comment.id)
+                yield sse_event(comment_payload(comment))
+        # An id-only message sets the browser's Last-Event-ID without firing an event
+        yield f'id: {max(seen, default=after)}\nretry: {RETRY_MS}\n\n'
+        # Idle streams should not hold a database connection open
+        await sync_to_async(_close_connection)()
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=min(heartbeat_interval(), remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if payload['id'] <= after or payload['id'] in seen:
+                continue
+            seen.add(payload['id'])
+            yield sse_event(payload)
+    finally:
+        comment_broker.unsubscribe(user_id, queue)
@@ -0,0 +1,53 @@
+import csv
+
+from django.db.models import OuterRef, Subquery
+
+from accounts.models import StudentClass
+from .models import Grade
+
+CHUNK_SIZE = 2000
+EXPORT_HEADER = [
+    'student_id', 'student_name', 'student_email', 'class', 'subject_code', 'subject_name',
+    'teacher_email', 'test_score', 'exam_score', 'total_score', 'updated_at',
+]
+
+
+class Echo:
+    """File-like object whose write() hands the line straight back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(chunk_size=CHUNK_SIZE):
+    """
+    Yield the header and then one list per Grade joined with student, class
+    and subject. Rows are streamed from a server-side iterator as plain
+    tuples, so memory stays flat however many grades there are.
+
+    The class column is the student's earliest class, the one their
+    dashboard shows; joining StudentClass directly would repeat a grade
+    once per class for students in more than one.
+    """
+    yield EXPORT_HEADER
+    class_name = StudentClass.objects.filter(
+        student_id=OuterRef('student_id')
+    ).order_by('id').values('class_assigned__name')[:1]
+    rows = Grade.objects.annotate(class_name=Subquery(class_name)).order_by('id').values_list(
+        'student_id', 'student__first_name', 'student__last_name', 'student__email',
+        'class_name', 'subject__code', 'subject__name',
+        'teacher__email', 'test_score', 'exam_score', 'total_score', 'updated_at',
+    ).iterator(chunk_size=chunk_size)
+    for (student_id, first_name, last_name, email, class_name, subject_code, subject_name,
+         teacher_email, test_score, exam_score, total_score, updated_at) in rows:
+        yield [
+            student_id, f'{first_name} {last_name}'.strip(), email, class_name or '',
+            subject_code, subject_name, teacher_email, test_score, exam_score, total_score,
+            updated_at.isoformat(),
+        ]
+
+
+def export_csv_lines(chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    for row in export_rows(chunk_size):
+        yield writer.writerow(row)
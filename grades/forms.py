@@ -1,12 +1,15 @@
 from django import forms
 from .models import Grade, Comment
-from accounts.models import Class, CustomUser, Subject, TeacherSubject
+from accounts.models import Class, CustomUser, Subject
+from accounts.autocomplete import AutocompleteSelect, person_label
+from accounts.scope import get_scope, students_in_classes, teaches
 
 class GradeForm(forms.ModelForm):
     class Meta:
         model = Grade
         fields = ['student', 'subject', 'test_score', 'exam_score']
         widgets = {
+            'student': AutocompleteSelect('autocomplete_students'),
             'test_score': forms.NumberInput(attrs={'min': 0, 'max': 100, 'step': 0.01}),
             'exam_score': forms.NumberInput(attrs={'min': 0, 'max': 100, 'step': 0.01}),
         }
@@ -14,6 +17,8 @@ class GradeForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         teacher = kwargs.pop('teacher', None)
         super().__init__(*args, **kwargs)
+        self.teacher = teacher
+        self.fields['student'].label_from_instance = person_label
         
         if teacher:
             # For existing instances (editing), lock student and subject
@@ -29,61 +34,81 @@ class GradeForm(forms.ModelForm):
                     id=self.instance.subject.id
                 )
             else:
-                # For new grades, use the existing filtering logic
-                teacher_subjects = TeacherSubject.objects.filter(teacher=teacher)
-                subject_ids = teacher_subjects.values_list('subject_id', flat=True)
-                self.fields['subject'].queryset = Subject.objects.filter(id__in=subject_ids)
-                
-                class_ids = teacher_subjects.values_list('class_assigned_id', flat=True)
-                from accounts.models import StudentClass
-                student_class_ids = StudentClass.objects.filter(
-                    class_assigned_id__in=class_ids
-                ).values_list('student_id', flat=True)
-                self.fields['student'].queryset = CustomUser.objects.filter(
-                    id__in=student_class_ids, 
-                    user_type='student'
-                )
+                # For new grades, limit choices to the teacher's cached scope
+                scope = get_scope(teacher)
+                self.fields['subject'].queryset = Subject.objects.filter(id__in=scope['subject_ids'])
+                self.fields['student'].queryset = students_in_classes(scope['class_ids'])
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        student = cleaned_data.get('student')
+        subject = cleaned_data.get('subject')
+        # The cached scope only narrows the choices; the permission check reads the current assignments
+        if self.teacher and not self.instance.pk and student and subject:
+            if not teaches(self.teacher.id, student.id, subject.id):
+                raise forms.ValidationError("You do not teach this subject in the student's class")
+        return cleaned_data
                                     
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ['receiver', 'subject', 'message']
         widgets = {
+            'receiver': AutocompleteSelect('autocomplete_students'),
             'message': forms.Textarea(attrs={'rows': 4}),
         }
     
     def __init__(self, *args, **kwargs):
         sender = kwargs.pop('sender', None)
         super().__init__(*args, **kwargs)
+        self.fields['receiver'].label_from_instance = person_label
         
         if sender:
+            scope = get_scope(sender)
             if sender.user_type == 'teacher':
                 # Teachers can comment to students they teach
-                teacher_subjects = TeacherSubject.objects.filter(teacher=sender)
-                class_ids = teacher_subjects.values_list('class_assigned_id', flat=True)
-                from accounts.models import StudentClass
-                student_ids = StudentClass.objects.filter(class_assigned_id__in=class_ids).values_list('student_id', flat=True)
-                self.fields['receiver'].queryset = CustomUser.objects.filter(id__in=student_ids, user_type='student')
-                
-                subject_ids = teacher_subjects.values_list('subject_id', flat=True)
-                self.fields['subject'].queryset = Subject.objects.filter(id__in=subject_ids)
-                
-            elif sender.user_type == 'student':
+                self.fields['receiver'].queryset = students_in_classes(scope['class_ids'])
+            else:
                 # Students can comment to their teachers
-                try:
-                    from accounts.models import StudentClass, StudentSubject
-                    student_class = StudentClass.objects.get(student=sender)
- 
-                    teacher_subjects = TeacherSubject.objects.filter(class_assigned=student_class.class_assigned)
-                    subject_ids = teacher_subjects.values_list('subject_id', flat=True)
-                    
-                    teacher_ids = TeacherSubject.objects.filter(
-                        subject_id__in=subject_ids,
-                        class_assigned=student_class.class_assigned
-                    ).values_list('teacher_id', flat=True)
-                    
-                    self.fields['receiver'].queryset = CustomUser.objects.filter(id__in=teacher_ids, user_type='teacher')
-                    self.fields['subject'].queryset = Subject.objects.filter(id__in=subject_ids)
-                except:
-                    self.fields['receiver'].queryset = CustomUser.objects.none()
-                    self.fields['subject'].queryset = Subject.objects.none()
+                self.fields['receiver'].widget.url_name = 'autocomplete_teachers'
+                self.fields['receiver'].queryset = CustomUser.objects.filter(
+                    id__in=scope['teacher_ids'], user_type='teacher'
+                )
+            self.fields['subject'].queryset = Subject.objects.filter(id__in=scope['subject_ids'])
+
+
+class GradebookRowForm(forms.Form):
+    student_id = forms.IntegerField(widget=forms.HiddenInput)
+    test_score = forms.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100, required=False,
+        widget=forms.NumberInput(attrs={'min': 0, 'max': 100, 'step': 0.01, 'class': 'form-control form-control-sm'}),
+    )
+    exam_score = forms.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100, required=False,
+        widget=forms.NumberInput(attrs={'min': 0, 'max': 100, 'step': 0.01, 'class': 'form-control form-control-sm'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        test_score = cleaned_data.get('test_score')
+        exam_score = cleaned_data.get('exam_score')
+        # A row is either left blank (skipped) or has both scores
+        if (test_score is None) != (exam_score is None):
+            raise forms.ValidationError('Enter both the test and exam score, or leave the row blank')
+        return cleaned_data
+
+
+GradebookFormSet = forms.formset_factory(GradebookRowForm, extra=0)
+
+
+class GradeImportForm(forms.Form):
+    file = forms.FileField(
+        help_text='CSV or XLSX with columns student_email, subject_code, test_score, exam_score '
+                  'and optionally teacher_email'
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file')
+        return upload
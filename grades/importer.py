@@ -0,0 +1,188 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from accounts.models import CustomUser, StudentClass, Subject, TeacherSubject
+from .analytics import invalidate_school_report
+from .bulk import upsert_grades
+from .models import Grade
+from .results import recompute_results
+from .stats import refresh_class_subject_stats
+
+BATCH_SIZE = 1000
+REQUIRED_COLUMNS = {'student_email', 'subject_code', 'test_score', 'exam_score'}
+MAX_SCORE = Decimal('100')
+# Where csv.DictReader puts the values of a row that is longer than the header
+EXTRA_FIELDS = 'extra_fields'
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def read_csv_rows(stream):
+    """Yield one dict per row of a binary CSV stream, reading it lazily."""
+    stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(stream, restkey=EXTRA_FIELDS)
+    check_columns(reader.fieldnames or [])
+    for row in reader:
+        extra = row.pop(EXTRA_FIELDS, None)
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        if extra:
+            row[EXTRA_FIELDS] = extra
+        yield row
+
+
+def read_xlsx_rows(stream):
+    """Yield one dict per row of the first worksheet in read-only (streaming) mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('openpyxl is required to import .xlsx files')
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell or '').strip().lower() for cell in next(rows, [])]
+        check_columns(header)
+        for values in rows:
+            yield {
+                key: '' if value is None else str(value).strip()
+                for key, value in zip(header, values)
+            }
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, filename):
+    if filename.lower().endswith('.xlsx'):
+        return read_xlsx_rows(stream)
+    return read_csv_rows(stream)
+
+
+def check_columns(columns):
+    missing = REQUIRED_COLUMNS - {column.strip().lower() for column in columns}
+    if missing:
+        raise ImportFormatError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+
+class GradeLookups:
+    """In-memory id maps built once per import so rows resolve without queries."""
+
+    def __init__(self):
+        self.students = {
+            email.lower(): student_id
+            for student_id, email in CustomUser.objects.filter(user_type='student').values_list('id', 'email')
+        }
+        self.teachers = {
+            email.lower(): teacher_id
+            for teacher_id, email in CustomUser.objects.filter(user_type='teacher').values_list('id', 'email')
+        }
+        self.subjects = {
+            code.upper(): subject_id
+            for subject_id, code in Subject.objects.values_list('id', 'code')
+        }
+        # A student can be in more than one class
+        self.student_classes = {}
+        for student_id, class_id in StudentClass.objects.values_list('student_id', 'class_assigned_id'):
+            self.student_classes.setdefault(student_id, set()).add(class_id)
+        self.class_teachers = {
+            (class_id, subject_id): teacher_id
+            for teacher_id, class_id, subject_id in TeacherSubject.objects.values_list(
+                'teacher_id', 'class_assigned_id', 'subject_id'
+            )
+        }
+
+    def resolve(self, row):
+        """Return an unsaved Grade for the row or raise ValueError with the reason."""
+        extra = row.get(EXTRA_FIELDS)
+        if extra:
+            raise ValueError(f'{len(extra)} more field(s) than the header')
+        student_id = self.students.get(row.get('student_email', '').lower())
+        if student_id is None:
+            raise ValueError(f"unknown student '{row.get('student_email', '')}'")
+        subject_id = self.subjects.get(row.get('subject_code', '').upper())
+        if subject_id is None:
+            raise ValueError(f"unknown subject '{row.get('subject_code', '')}'")
+
+        teacher_email = row.get('teacher_email', '')
+        if teacher_email:
+            teacher_id = self.teachers.get(teacher_email.lower())
+            if teacher_id is None:
+                raise ValueError(f"unknown teacher '{teacher_email}'")
+        else:
+            teacher_id = next((
+                self.class_teachers[class_id, subject_id]
+                for class_id in sorted(self.student_classes.get(student_id, ()))
+                if (class_id, subject_id) in self.class_teachers
+            ), None)
+            if teacher_id is None:
+                raise ValueError('no teacher assigned to this subject in the student\'s class')
+
+        return Grade(
+            student_id=student_id,
+            subject_id=subject_id,
+            teacher_id=teacher_id,
+            test_score=parse_score(row.get('test_score', ''), 'test_score'),
+            exam_score=parse_score(row.get('exam_score', ''), 'exam_score'),
+        )
+
+
+def parse_score(value, column):
+    try:
+        score = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{column} '{value}' is not a number")
+    if not score.is_finite() or score < 0 or score > MAX_SCORE:
+        raise ValueError(f'{column} must be between 0 and {MAX_SCORE}')
+    return score.quantize(Decimal('0.01'))
+
+
+def import_grades(rows, on_error=None, batch_size=BATCH_SIZE):
+    """
+    Upsert grades from an iterable of row dicts in fixed-size batches, each
+    in its own transaction. Only one batch is held in memory at a time;
+    bad rows are reported through on_error(row_number, message) and skipped.
+    """
+    lookups = GradeLookups()
+    summary = {'rows': 0, 'imported': 0, 'errors': 0}
+    touched_groups = set()
+    batch = {}
+
+    def flush():
+        if not batch:
+            return
+        with transaction.atomic():
+            upsert_grades(list(batch.values()), batch_size=batch_size)
+            recompute_results({student_id for student_id, _ in batch})
+        summary['imported'] += len(batch)
+        for student_id, subject_id in batch:
+            for class_id in lookups.student_classes.get(student_id, ()):
+                touched_groups.add((class_id, subject_id))
+        batch.clear()
+
+    try:
+        # Row 1 is the header
+        for row_number, row in enumerate(rows, start=2):
+            summary['rows'] += 1
+            try:
+                grade = lookups.resolve(row)
+            except ValueError as error:
+                summary['errors'] += 1
+                if on_error:
+                    on_error(row_number, str(error))
+                continue
+
+            # A later row for the same student and subject wins
+            batch[(grade.student_id, grade.subject_id)] = grade
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        # Batches committed before a failure are in the database; keep the statistics in step
+        for class_id, subject_id in touched_groups:
+            refresh_class_subject_stats(class_id, subject_id)
+        invalidate_school_report()
+    return summary
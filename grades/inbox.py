@@ -0,0 +1,152 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from accounts.pagination import decode_cursor, encode_cursor, seek_filter
+from .models import Comment, CommentCounter
+
+INBOX_ORDERING = ['-created_at', 'id']
+# Oldest first; '-id' lets SQLite walk the (receiver, -created_at) index backwards
+SINCE_ORDERING = ['created_at', '-id']
+SINCE_LIMIT = 50
+
+
+def count_comments(user_ids=None):
+    """Return {user_id: (received, sent, unread)} from two grouped counts over Comment."""
+    received = Comment.objects.all()
+    sent = Comment.objects.all()
+    counts = {}
+    if user_ids is not None:
+        received = received.filter(receiver_id__in=user_ids)
+        sent = sent.filter(sender_id__in=user_ids)
+        counts = {user_id: [0, 0, 0] for user_id in user_ids}
+
+    received = received.values_list('receiver_id').annotate(
+        total=Count('id'), unread=Count('id', filter=Q(read_at__isnull=True)),
+    ).order_by()
+    for user_id, total, unread in received:
+        counts.setdefault(user_id, [0, 0, 0])
+        counts[user_id][0] = total
+        counts[user_id][2] = unread
+    for user_id, total in sent.values_list('sender_id').annotate(total=Count('id')).order_by():
+        counts.setdefault(user_id, [0, 0, 0])[1] = total
+    return {user_id: tuple(values) for user_id, values in counts.items()}
+
+
+def recount_comment_counters(user_ids=None):
+    """
+    Rebuild CommentCounter rows from Comment in one upsert. Pass user_ids
+    to limit the refresh; without them every user who sent or received a
+    comment is recounted.
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+    counts = count_comments(user_ids)
+    if not counts:
+        return 0
+
+    now = timezone.now()
+    counters = [
+        CommentCounter(user_id=user_id, received=received, sent=sent, unread=unread, updated_at=now)
+        for user_id, (received, sent, unread) in counts.items()
+    ]
+    CommentCounter.objects.bulk_create(
+        counters,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['received', 'sent', 'unread', 'updated_at'],
+        batch_size=2000,
+    )
+    return len(counters)
+
+
+def apply_comment_delta(user_id, received=0, sent=0, unread=0, create=True):
+    """
+    Shift a user's CommentCounter in one UPDATE. A missing row is rebuilt
+    from Comment unless `create` is False (the user may be being deleted).
+    """
+    updated = CommentCounter.objects.filter(user_id=user_id).update(
+        received=F('received') + received,
+        sent=F('sent') + sent,
+        unread=F('unread') + unread,
+        updated_at=timezone.now(),
+    )
+    if not updated and create:
+        recount_comment_counters([user_id])
+
+
+def get_comment_counter(user):
+    counter = CommentCounter.objects.filter(user=user).first()
+    if counter is None:
+        recount_comment_counters([user.id])
+        counter = CommentCounter.objects.get(user=user)
+    return counter
+
+
+def mark_read(user, comment_ids):
+    """Mark the user's unread comments among `comment_ids` as read; returns how many changed."""
+    with transaction.atomic():
+        marked = Comment.objects.filter(
+            receiver=user, id__in=list(comment_ids), read_at__isnull=True,
+        ).update(read_at=timezone.now())
+        if marked:
+            apply_comment_delta(user.id, unread=-marked)
+    return marked
+
+
+def latest_cursor(user):
+    """The ?since= cursor for the newest comment the user has received, or '' if none."""
+    newest = Comment.objects.filter(receiver=user).order_by(*INBOX_ORDERING).values_list('created_at', 'id').first()
+    return encode_cursor(list(newest)) if newest else ''
+
+
+def comments_since(user, since, limit=SINCE_LIMIT):
+    """
+    Up to `limit` comments received after the `since` cursor, oldest first,
+    with the cursor to poll from next and whether more are waiting. An
+    empty or unreadable cursor starts from the first comment.
+    """
+    comments = Comment.objects.filter(receiver=user).select_related('sender', 'subject').order_by(*SINCE_ORDERING)
+    values = decode_cursor(since, len(SINCE_ORDERING)) if since else None
+    try:
+        if values is not None:
+            # The plain bound gives the index a range to seek to; seek_filter settles ties
+            rows = list(comments.filter(created_at__gte=values[0]).filter(
+                seek_filter(SINCE_ORDERING, values, backwards=False)
+            )[:limit + 1])
+        else:
+            rows = list(comments[:limit + 1])
+    except (ValueError, ValidationError):
+        # A tampered cursor with values of the wrong type; start over
+        rows = list(comments[:limit + 1])
+        since = ''
+    more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = encode_cursor([rows[-1].created_at, rows[-1].id]) if rows else since
+    return rows, cursor, more
+
+
+def comment_payload(comment):
+    """JSON-ready view of a received comment; needs sender and subject loaded."""
+    return {
+        'id': comment.id,
+        'sender': comment.sender.get_full_name(),
+        'subject': comment.subject.name,
+        'message': comment.message,
+        'created_at': comment.created_at.isoformat(),
+        'read': comment.read_at is not None,
+    }
+
+
+def updates_etag(counter, since):
+    """
+    Validator for a ?since= poll, built from the counter row alone: any new,
+    read or deleted comment touches the counter, so a match means nothing
+    changed and the comments table need not be read.
+    """
+    state = f'{counter.user_id}:{counter.updated_at.isoformat()}:{counter.received}:{counter.unread}:{since}'
+    return quote_etag(hashlib.sha256(state.encode()).hexdigest())
@@ -0,0 +1,228 @@
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register a function(job) -> result dict as the runner for a job kind."""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def job_output_dir():
+    path = Path(getattr(settings, 'JOB_OUTPUT_DIR', Path(settings.BASE_DIR) / 'job_output'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def job_max_attempts():
+    return getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+
+
+def job_heartbeat_seconds():
+    return getattr(settings, 'JOB_HEARTBEAT_SECONDS', 30)
+
+
+def enqueue(kind, payload=None, user=None):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    return Job.objects.create(kind=kind, payload=payload or {}, created_by=user)
+
+
+def claim_next_job(worker_name):
+    """
+    Atomically move the oldest pending job to running. SKIP LOCKED keeps
+    PostgreSQL workers off each other's rows; the conditional UPDATE is
+    what makes the claim safe on SQLite, which has no row locks.
+    """
+    with transaction.atomic():
+        pending = Job.objects.filter(status=Job.PENDING).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        job = pending.first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(id=job.id, status=Job.PENDING).update(
+            status=Job.RUNNING,
+            worker=worker_name,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+@contextmanager
+def heartbeat(job_id, interval):
+    """
+    Touch the job's heartbeat_at every `interval` seconds from a background
+    thread while the body runs, so long jobs are not mistaken for dead ones.
+    """
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(interval):
+                try:
+                    Job.objects.filter(id=job_id, status=Job.RUNNING).update(heartbeat_at=timezone.now())
+                except OperationalError:
+                    # e.g. "database is locked"; the next beat will do
+                    pass
+        finally:
+            # The thread opened its own connection
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'job-{job_id}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job):
+    try:
+        with heartbeat(job.id, job_heartbeat_seconds()):
+            result = JOB_HANDLERS[job.kind](job)
+    except Exception:
+        Job.objects.filter(id=job.id).update(
+            status=Job.FAILED,
+            error=traceback.format_exc(),
+            finished_at=timezone.now(),
+        )
+        return False
+
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE,
+        result=result,
+        output_path=job.output_path,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def requeue_stale_jobs(stale_after, max_attempts=None):
+    """
+    Deal with running jobs whose worker has sent no heartbeat for
+    stale_after seconds: put them back in the queue, or mark them failed
+    once they have been tried max_attempts times. Returns (requeued, failed).
+    """
+    max_attempts = max_attempts or job_max_attempts()
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status=Job.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=Job.FAILED,
+        error=f'The worker stopped responding on each of {max_attempts} attempts.',
+        finished_at=now,
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=Job.PENDING,
+        worker='',
+    )
+    return requeued, failed
+
+
+def worker_loop(poll_interval=1.0, stale_after=300, burst=False):
+    """
+    Claim and run jobs until stopped with SIGTERM/SIGINT. With burst=True
+    the worker exits as soon as the queue is empty.
+    """
+    django.setup()
+    # Never share the parent's database connection with a child process
+    connections.close_all()
+
+    worker_name = f'{socket.gethostname()}:{os.getpid()}'
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+
+    last_requeue = 0
+    while not stopping:
+        try:
+            if time.monotonic() - last_requeue > poll_interval * 60:
+                requeue_stale_jobs(stale_after)
+                last_requeue = time.monotonic()
+            job = claim_next_job(worker_name)
+        except OperationalError:
+            # e.g. "database is locked" while another worker writes
+            time.sleep(poll_interval)
+            continue
+
+        if job is None:
+            if burst and not Job.objects.filter(status=Job.PENDING).exists():
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+    connections.close_all()
+
+
+@job_handler('recompute_results')
+def recompute_results_job(job):
+    from .results import recompute_results
+
+    return {'students': recompute_results()}
+
+
+@job_handler('batch_transcripts')
+def batch_transcripts_job(job):
+    from .transcripts import generate_transcripts
+
+    job.output_path = f'transcripts_{job.id}_{uuid.uuid4().hex[:8]}.zip'
+    stats = generate_transcripts(
+        str(job_output_dir() / job.output_path),
+        class_id=job.payload.get('class_id'),
+        student_ids=job.payload.get('student_ids'),
+    )
+    return {
+        'transcripts': stats['count'],
+        'seconds': round(stats['elapsed'], 2),
+        'files_per_second': round(stats['files_per_second'], 1),
+    }
+
+
+@job_handler('import_grades')
+def import_grades_job(job):
+    from .importer import import_grades, read_rows
+
+    row_errors = []
+    max_errors = job.payload.get('max_errors', 100)
+
+    def collect_error(row_number, message):
+        if len(row_errors) < max_errors:
+            row_errors.append({'row': row_number, 'message': message})
+
+    upload_path = job_output_dir() / job.payload['path']
+    try:
+        with open(upload_path, 'rb') as stream:
+            summary = import_grades(read_rows(stream, job.payload['filename']), on_error=collect_error)
+    finally:
+        upload_path.unlink(missing_ok=True)
+    return dict(summary, row_errors=row_errors)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from grades.query_plans import check_query_plans
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot queries and fail if any of them falls back to a full table scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failing ones')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Plan checks are not implemented for {connection.vendor}')
+
+        failures = 0
+        for hot_query, plan, problems, uses_index in check_query_plans():
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'FAIL {hot_query.name}'))
+                for problem in problems:
+                    self.stdout.write(f'  {problem}')
+            else:
+                note = '' if uses_index else f' (planner chose another index than {hot_query.index})'
+                self.stdout.write(self.style.SUCCESS(f'ok   {hot_query.name}') + note)
+            if problems or options['verbose_plans']:
+                self.stdout.write('  ' + plan.replace('\n', '\n  '))
+
+        if failures:
+            raise CommandError(f'{failures} hot query plan(s) fall back to a scan')
@@ -0,0 +1,32 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from grades.exporter import CHUNK_SIZE, export_csv_lines
+
+
+class Command(BaseCommand):
+    help = 'Stream every grade joined with student, class and subject to CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or '-' for stdout")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Rows fetched from the database per round trip')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
+        count = -1  # the header line isn't a grade
+        output = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        try:
+            for line in export_csv_lines(options['chunk_size']):
+                output.write(line)
+                count += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if output is not sys.stdout:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'Exported {count} grade(s) to {path} in {elapsed:.2f}s'))
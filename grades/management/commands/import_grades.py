@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from grades.importer import BATCH_SIZE, ImportFormatError, import_grades, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Import grades from a CSV or XLSX file with columns student_email, subject_code, '
+        'test_score, exam_score and optionally teacher_email'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Rows upserted per transaction')
+
+    def handle(self, *args, **options):
+        path = options['path']
+
+        def report_error(row_number, message):
+            self.stderr.write(f'row {row_number}: {message}')
+
+        started = time.perf_counter()
+        try:
+            with open(path, 'rb') as stream:
+                summary = import_grades(
+                    read_rows(stream, path),
+                    on_error=report_error,
+                    batch_size=options['batch_size'],
+                )
+        except (OSError, ImportFormatError) as error:
+            raise CommandError(str(error))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['imported']} grade(s) from {summary['rows']} row(s) "
+            f"with {summary['errors']} error(s) in {elapsed:.2f}s"
+        ))
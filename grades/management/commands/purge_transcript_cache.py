@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from grades.transcript_cache import cached_files, evict, max_cache_bytes, purge
+
+
+class Command(BaseCommand):
+    help = 'Evict or delete cached transcript PDFs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Delete every cached PDF')
+        parser.add_argument('--max-bytes', type=int, default=None,
+                            help='Evict least recently used PDFs down to this size '
+                                 '(default: TRANSCRIPT_CACHE_MAX_BYTES)')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            removed = purge()
+        else:
+            max_bytes = options['max_bytes'] if options['max_bytes'] is not None else max_cache_bytes()
+            removed = evict(max_bytes)
+
+        remaining = cached_files()
+        size = sum(file_size for _, file_size, _ in remaining)
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} PDF(s); {len(remaining)} left using {size / 1024 / 1024:.1f} MB'
+        ))
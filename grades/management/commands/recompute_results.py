@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from grades.results import recompute_results
+
+
+class Command(BaseCommand):
+    help = 'Recompute every StudentResult from the Grade table in one set-based pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append', dest='student_ids',
+                            help='Only recompute this student id (repeatable)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = recompute_results(options['student_ids'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {count} student result(s) in {elapsed:.2f}s'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from grades.results import find_drifted_results, recompute_results
+
+
+class Command(BaseCommand):
+    help = 'Check incrementally maintained StudentResult rows against the Grade table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Recompute the drifted rows instead of failing')
+
+    def handle(self, *args, **options):
+        drifted = find_drifted_results()
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All student results match their grades'))
+            return
+
+        for student_id, stored, expected in drifted:
+            self.stdout.write(f'student {student_id}: stored={stored} expected={expected}')
+
+        if not options['fix']:
+            raise CommandError(f'{len(drifted)} student result(s) out of sync; rerun with --fix')
+
+        recompute_results([student_id for student_id, _, _ in drifted])
+        self.stdout.write(self.style.SUCCESS(f'Fixed {len(drifted)} student result(s)'))
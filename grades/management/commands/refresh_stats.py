@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from grades.stats import refresh_all_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized class/subject statistics table'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = refresh_all_stats()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Refreshed statistics for {count} class/subject pair(s) in {elapsed:.2f}s'))
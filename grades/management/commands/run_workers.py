@@ -0,0 +1,53 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+
+from grades.jobs import worker_loop
+
+
+class Command(BaseCommand):
+    help = 'Run background job worker processes against the Job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Requeue (or fail, after JOB_MAX_ATTEMPTS) running jobs with no heartbeat '
+                                 'for this many seconds; keep it well above JOB_HEARTBEAT_SECONDS')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        kwargs = {
+            'poll_interval': options['poll_interval'],
+            'stale_after': options['stale_after'],
+            'burst': options['burst'],
+        }
+        if options['processes'] <= 1:
+            worker_loop(**kwargs)
+            return
+
+        workers = [
+            multiprocessing.Process(target=worker_loop, kwargs=kwargs, name=f'grades-worker-{number}')
+            for number in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {len(workers)} worker process(es)')
+
+        def stop(*args):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from grades.seeding import BATCH_SIZE, DEFAULT_EMAIL_DOMAIN, DEFAULT_PASSWORD, SeedError, seed_school
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic school (users, classes, subjects, grades, comments) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--teachers', type=int, default=50)
+        parser.add_argument('--classes', type=int, default=20)
+        parser.add_argument('--subjects', type=int, default=10)
+        parser.add_argument('--graded-ratio', type=float, default=0.9,
+                            help='Share of student/subject pairs that get a grade')
+        parser.add_argument('--comments-per-student', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; same seed, same school')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Students written per transaction')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD,
+                            help='Password shared by every generated account')
+        parser.add_argument('--email-domain', default=DEFAULT_EMAIL_DOMAIN)
+        parser.add_argument('--skip-results', action='store_true',
+                            help='Do not compute StudentResult and class statistics afterwards')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            counts = seed_school(
+                students=options['students'],
+                teachers=options['teachers'],
+                classes=options['classes'],
+                subjects=options['subjects'],
+                graded_ratio=options['graded_ratio'],
+                comments_per_student=options['comments_per_student'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                password=options['password'],
+                email_domain=options['email_domain'],
+                compute_results=not options['skip_results'],
+                progress=self.stdout.write if options['verbosity'] > 1 else None,
+            )
+        except SeedError as error:
+            raise CommandError(str(error))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['students']} students, {counts['teachers']} teachers, {counts['classes']} classes, "
+            f"{counts['subjects']} subjects, {counts['grades']} grades and {counts['comments']} comments "
+            f"in {elapsed:.1f}s (admin login: {counts['admin_email']})"
+        ))
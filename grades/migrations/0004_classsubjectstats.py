@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('grades', '0003_schoolsettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassSubjectStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_count', models.IntegerField(default=0)),
+                ('mean_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('median_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('std_dev', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('min_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('max_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('p25_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('p75_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('p90_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.class')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.subject')),
+            ],
+            options={
+                'verbose_name_plural': 'Class subject statistics',
+                'unique_together': {('class_assigned', 'subject')},
+            },
+        ),
+    ]
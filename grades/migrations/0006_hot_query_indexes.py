@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_hot_query_indexes'),
+        ('grades', '0005_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['receiver', '-created_at'], name='grades_comm_receive_846855_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['sender', '-created_at'], name='grades_comm_sender__d6b5e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['teacher', 'student', 'subject'], name='grades_grad_teacher_cd8d9b_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def backfill_counters(apps, schema_editor):
+    Comment = apps.get_model('grades', 'Comment')
+    CommentCounter = apps.get_model('grades', 'CommentCounter')
+    # Comments from before read tracking count as read
+    Comment.objects.filter(read_at__isnull=True).update(read_at=F('created_at'))
+
+    counters = {}
+    for user_id, received in Comment.objects.values_list('receiver').annotate(Count('id')).order_by():
+        counters[user_id] = CommentCounter(user_id=user_id, received=received)
+    for user_id, sent in Comment.objects.values_list('sender').annotate(Count('id')).order_by():
+        counters.setdefault(user_id, CommentCounter(user_id=user_id)).sent = sent
+    CommentCounter.objects.bulk_create(counters.values(), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0006_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='CommentCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('received', models.IntegerField(default=0)),
+                ('sent', models.IntegerField(default=0)),
+                ('unread', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='comment_counter', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from accounts.models import CustomUser, Subject, StudentClass, StudentSubject
+from accounts.models import Class, CustomUser, Subject, StudentClass, StudentSubject
 
 class Grade(models.Model):
     
@@ -14,6 +14,10 @@ class Grade(models.Model):
     
     class Meta:
         unique_together = ['student', 'subject']
+        indexes = [
+            # A teacher's grades for one student (student_grades_detail, teacher_grades)
+            models.Index(fields=['teacher', 'student', 'subject']),
+        ]
     
     def save(self, *args, **kwargs):
         self.total_score = self.test_score + self.exam_score
@@ -34,13 +38,31 @@ class Comment(models.Model):
     comment_type = models.CharField(max_length=20, choices=COMMENT_TYPE_CHOICES)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Inbox and outbox, newest first
+            models.Index(fields=['receiver', '-created_at']),
+            models.Index(fields=['sender', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.sender.get_full_name()} to {self.receiver.get_full_name()} - {self.subject.name}"
 
+
+class CommentCounter(models.Model):
+    """Per-user comment totals, kept in step by signals so pages never COUNT(*) the inbox."""
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='comment_counter')
+    received = models.IntegerField(default=0)
+    sent = models.IntegerField(default=0)
+    unread = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.get_full_name()}: {self.unread} unread"
+
 class StudentResult(models.Model):
     student = models.OneToOneField(CustomUser, on_delete=models.CASCADE, limit_choices_to={'user_type': 'student'})
     total_subjects = models.IntegerField(default=0)
@@ -50,17 +72,42 @@ class StudentResult(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def calculate_result(self):
-        grades = Grade.objects.filter(student=self.student)
-        if grades.exists():
-            self.total_subjects = grades.count()
-            self.total_score = sum(grade.total_score for grade in grades)
-            self.average_score = self.total_score / self.total_subjects if self.total_subjects > 0 else 0
+        totals = Grade.objects.filter(student_id=self.student_id).aggregate(
+            count=models.Count('id'),
+            total=models.Sum('total_score'),
+        )
+        self.total_subjects = totals['count']
+        self.total_score = totals['total'] or 0
+        self.average_score = self.total_score / self.total_subjects if self.total_subjects > 0 else 0
         self.save()
     
     def __str__(self):
         return f"{self.student.get_full_name()}"
 
 
+class ClassSubjectStats(models.Model):
+    """Materialized Grade.total_score statistics for one (class, subject) pair."""
+    class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    student_count = models.IntegerField(default=0)
+    mean_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    median_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    std_dev = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    min_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    max_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    p25_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    p75_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    p90_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['class_assigned', 'subject']
+        verbose_name_plural = "Class subject statistics"
+
+    def __str__(self):
+        return f"{self.class_assigned.name} - {self.subject.name}"
+
+
 class SchoolSettings(models.Model):
     name = models.CharField(max_length=100, default="My School")
     logo = models.ImageField(upload_to='school_logos/', null=True, blank=True)
@@ -69,4 +116,39 @@ class SchoolSettings(models.Model):
         verbose_name_plural = "School Settings"
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class Job(models.Model):
+    """A unit of background work claimed and run by `manage.py run_workers`."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    output_path = models.CharField(max_length=255, blank=True)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched periodically by the worker running the job; a stale one means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
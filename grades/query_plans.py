@@ -0,0 +1,113 @@
+import re
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+
+from accounts.models import CustomUser, StudentClass, TeacherSubject
+from accounts.autocomplete import name_conditions, people_matching, people_queryset
+from accounts.pagination import seek_filter
+from accounts.scope import subjects_for_student
+from .inbox import INBOX_ORDERING, SINCE_ORDERING
+from .models import Comment, Grade
+
+
+PLACEHOLDER_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class HotQuery:
+    def __init__(self, name, table, index, build, ordered=False):
+        self.name = name
+        self.table = table
+        self.index = index
+        self.build = build
+        self.ordered = ordered
+
+
+def _student_grades_detail():
+    # Same shape as the view: the subject ids come from the teacher's cached scope
+    scope = {'pairs': {(1, 1), (1, 2), (2, 3)}, 'student_classes': {1: {1}}}
+    return Grade.objects.filter(
+        teacher_id=1, student_id=1, subject_id__in=subjects_for_student(scope, 1)
+    ).select_related('subject').order_by('subject__name')
+
+
+# The queries behind the busiest pages, with the table they must not scan
+# and the index added for them. Ids are placeholders: plans do not depend on them.
+HOT_QUERIES = [
+    HotQuery('student_grades_detail', 'grades_grade', 'grades_grad_teacher_cd8d9b_idx', _student_grades_detail),
+    HotQuery('teacher grades for a student', 'grades_grade', 'grades_grad_teacher_cd8d9b_idx',
+             lambda: Grade.objects.filter(teacher_id=1, student_id=1)),
+    HotQuery('comments inbox', 'grades_comment', 'grades_comm_receive_846855_idx',
+             lambda: Comment.objects.filter(receiver_id=1).order_by(*INBOX_ORDERING)[:51], ordered=True),
+    HotQuery('comments outbox', 'grades_comment', 'grades_comm_sender__d6b5e8_idx',
+             lambda: Comment.objects.filter(sender_id=1).order_by(*INBOX_ORDERING)[:51], ordered=True),
+    HotQuery('comments since cursor', 'grades_comment', 'grades_comm_receive_846855_idx',
+             lambda: Comment.objects.filter(receiver_id=1, created_at__gte=PLACEHOLDER_TIME).filter(
+                 seek_filter(SINCE_ORDERING, [PLACEHOLDER_TIME, 1], backwards=False)
+             ).order_by(*SINCE_ORDERING)[:51],
+             ordered=True),
+    HotQuery('students by name (first page)', 'accounts_customuser', 'accounts_cu_user_ty_eb7517_idx',
+             lambda: CustomUser.objects.filter(user_type='student').order_by('first_name', 'last_name', 'id')[:51],
+             ordered=True),
+    HotQuery('students by name (next page)', 'accounts_customuser', 'accounts_cu_user_ty_eb7517_idx',
+             lambda: CustomUser.objects.filter(user_type='student').filter(
+                 seek_filter(['first_name', 'last_name', 'id'], ['Ada', 'Bello', 1], backwards=False)
+             ).order_by('first_name', 'last_name', 'id')[:51],
+             ordered=True),
+    HotQuery('student autocomplete by first name', 'accounts_customuser', 'accounts_user_first_lower_idx',
+             lambda: people_queryset(CustomUser.objects.filter(user_type='student')).filter(
+                 name_conditions('ad')[0]
+             )[:21],
+             ordered=True),
+    # Read from the last name index, then sorted into first name order
+    HotQuery('student autocomplete by last name', 'accounts_customuser', 'accounts_user_last_lower_idx',
+             lambda: people_queryset(CustomUser.objects.filter(user_type='student')).filter(
+                 name_conditions('ad')[-1]
+             )[:21]),
+    HotQuery('admin search by name or email', 'accounts_customuser', 'accounts_user_first_lower_idx',
+             lambda: CustomUser.objects.filter(user_type='student', id__in=people_matching('ad')).order_by(
+                 'first_name', 'last_name', 'id'
+             )[:51]),
+    HotQuery('student assignments by name', 'accounts_studentclass', 'accounts_cu_user_ty_eb7517_idx',
+             lambda: StudentClass.objects.filter(student__user_type='student').select_related(
+                 'student', 'class_assigned'
+             ).order_by('student__first_name', 'student__last_name', 'id')[:51],
+             ordered=True),
+    HotQuery('teacher already assigned to class subject', 'accounts_teachersubject', 'accounts_te_class_a_f5f592_idx',
+             lambda: TeacherSubject.objects.filter(subject_id=1, class_assigned_id=1)),
+]
+
+
+def explain(queryset):
+    """EXPLAIN text for a queryset; on PostgreSQL sequential scans are priced out first."""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Tiny tables make a seq scan the cheapest plan; ask what the planner *can* do
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+
+def plan_problems(hot_query, plan):
+    """Full scans of the hot table, or a sort the index should have made unnecessary."""
+    problems = []
+    table = re.escape(hot_query.table)
+    if connection.vendor == 'sqlite':
+        for line in plan.splitlines():
+            if re.search(rf'\bSCAN {table}\b', line) and 'COVERING INDEX' not in line:
+                problems.append(f'full scan: {line.strip()}')
+        if hot_query.ordered and 'TEMP B-TREE FOR ORDER BY' in plan:
+            problems.append('sorts rows instead of reading them in index order')
+    elif connection.vendor == 'postgresql':
+        if re.search(rf'Seq Scan on {table}\b', plan):
+            problems.append(f'sequential scan on {hot_query.table}')
+    return problems
+
+
+def check_query_plans():
+    """Return [(hot_query, plan, problems, uses_expected_index)] for every hot query."""
+    results = []
+    for hot_query in HOT_QUERIES:
+        plan = explain(hot_query.build())
+        results.append((hot_query, plan, plan_problems(hot_query, plan), hot_query.index in plan))
+    return results
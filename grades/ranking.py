@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import DenseRank
+
+from accounts.models import StudentClass
+from .models import Grade, StudentResult
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def cache_key(class_id):
+    return f'grades:class_ranks:{class_id}'
+
+
+def compute_class_ranks(class_id):
+    """
+    Dense-rank every student in a class overall (by average score) and per
+    subject (by total score) with window functions, so the database does
+    the sorting.
+    """
+    overall = StudentResult.objects.filter(
+        student__studentclass__class_assigned_id=class_id,
+        total_subjects__gt=0,
+    ).annotate(
+        position=Window(
+            DenseRank(),
+            partition_by=[F('student__studentclass__class_assigned')],
+            order_by=F('average_score').desc(),
+        )
+    ).values_list('student_id', 'position')
+
+    by_subject = Grade.objects.filter(
+        student__studentclass__class_assigned_id=class_id,
+    ).annotate(
+        position=Window(
+            DenseRank(),
+            partition_by=[F('student__studentclass__class_assigned'), F('subject')],
+            order_by=F('total_score').desc(),
+        )
+    ).values_list('student_id', 'subject_id', 'position')
+
+    ranks = {
+        'class_size': StudentClass.objects.filter(class_assigned_id=class_id).count(),
+        'overall': dict(overall),
+        'subjects': {},
+    }
+    for student_id, subject_id, position in by_subject:
+        ranks['subjects'].setdefault(student_id, {})[subject_id] = position
+    return ranks
+
+
+def get_class_ranks(class_id):
+    ranks = cache.get(cache_key(class_id))
+    if ranks is None:
+        ranks = compute_class_ranks(class_id)
+        cache.set(cache_key(class_id), ranks, CACHE_TIMEOUT)
+    return ranks
+
+
+def invalidate_class_ranks(class_ids):
+    cache.delete_many([cache_key(class_id) for class_id in class_ids])
+
+
+def get_student_positions(student_id):
+    """
+    Return the student's overall and per-subject positions within their
+    class, or None when they are not assigned to one. A student in several
+    classes is ranked in their earliest assignment, the class
+    accounts.dashboard.get_student_class() shows.
+    """
+    class_id = StudentClass.objects.filter(
+        student_id=student_id
+    ).order_by('id').values_list('class_assigned_id', flat=True).first()
+    if class_id is None:
+        return None
+
+    ranks = get_class_ranks(class_id)
+    return {
+        'class_size': ranks['class_size'],
+        'overall': ranks['overall'].get(student_id),
+        'subjects': ranks['subjects'].get(student_id, {}),
+    }
+
+
+async def aget_student_positions(student_id):
+    """get_student_positions() for async views (grades.async_views)."""
+    class_id = await StudentClass.objects.filter(
+        student_id=student_id
+    ).order_by('id').values_list('class_assigned_id', flat=True).afirst()
+    if class_id is None:
+        return None
+
+    ranks = await cache.aget(cache_key(class_id))
+    if ranks is None:
+        # A miss runs the window queries; one hop for all of them
+        ranks = await sync_to_async(get_class_ranks)(class_id)
+    return {
+        'class_size': ranks['class_size'],
+        'overall': ranks['overall'].get(student_id),
+        'subjects': ranks['subjects'].get(student_id, {}),
+    }
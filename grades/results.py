@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from accounts.models import CustomUser, StudentClass
+from .models import StudentResult
+from .ranking import invalidate_class_ranks
+
+TWO_PLACES = Decimal('0.01')
+
+
+def build_result(student_id, total_subjects, total_score):
+    total_score = Decimal(total_score or 0)
+    average_score = total_score / total_subjects if total_subjects else Decimal('0')
+    return StudentResult(
+        student_id=student_id,
+        total_subjects=total_subjects,
+        total_score=total_score.quantize(TWO_PLACES),
+        average_score=average_score.quantize(TWO_PLACES),
+    )
+
+
+def aggregate_results(student_ids=None):
+    """Yield (student_id, total_subjects, total_score) from one grouped query."""
+    students = CustomUser.objects.filter(user_type='student')
+    if student_ids is not None:
+        students = students.filter(id__in=list(student_ids))
+
+    return students.annotate(
+        subject_count=Count('grade'),
+        score_sum=Coalesce(
+            Sum('grade__total_score'),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=8, decimal_places=2),
+        ),
+    ).values_list('id', 'subject_count', 'score_sum')
+
+
+def recompute_results(student_ids=None):
+    """
+    Rebuild StudentResult rows with one grouped aggregate over Grade and a
+    single upsert, instead of one calculate_result() per student.
+    Pass student_ids to limit the refresh to those students.
+    """
+    if student_ids is not None:
+        student_ids = list(student_ids)
+    results = [build_result(*row) for row in aggregate_results(student_ids)]
+    if not results:
+        return 0
+
+    with transaction.atomic():
+        StudentResult.objects.bulk_create(
+            results,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=['total_subjects', 'total_score', 'average_score', 'updated_at'],
+        )
+
+    memberships = StudentClass.objects.all()
+    if student_ids is not None:
+        memberships = memberships.filter(student_id__in=student_ids)
+    class_ids = set(memberships.values_list('class_assigned_id', flat=True))
+    transaction.on_commit(lambda: invalidate_class_ranks(class_ids))
+    return len(results)
+
+
+def apply_grade_delta(student_id, score_delta, subject_delta=0):
+    """
+    Shift a student's StudentResult by the change of a single Grade, in one
+    UPDATE, so the cost of a grade write doesn't depend on how many subjects
+    the student has. Call it inside the transaction that writes the Grade.
+    """
+    total_score = F('total_score') + Value(Decimal(score_delta))
+    total_subjects = F('total_subjects') + Value(subject_delta)
+
+    updated = StudentResult.objects.filter(student_id=student_id).update(
+        total_score=total_score,
+        total_subjects=total_subjects,
+        average_score=Case(
+            When(total_subjects__gt=-subject_delta,
+                 then=Cast(total_score, FloatField()) / total_subjects),
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=5, decimal_places=2),
+        ),
+    )
+    if not updated:
+        # No row yet: build it from the grades already written in this transaction
+        recompute_results([student_id])
+
+
+def find_drifted_results():
+    """Return [(student_id, stored, expected)] where StudentResult disagrees with Grade."""
+    stored = {
+        row[0]: row[1:]
+        for row in StudentResult.objects.values_list('student_id', 'total_subjects', 'total_score', 'average_score')
+    }
+    drifted = []
+    for row in aggregate_results():
+        expected = build_result(*row)
+        expected = (expected.total_subjects, expected.total_score, expected.average_score)
+        current = stored.get(row[0])
+        if current is None and not expected[0]:
+            continue
+        if current is None or tuple(Decimal(v).quantize(TWO_PLACES) for v in current) != expected:
+            drifted.append((row[0], current, expected))
+    return drifted
@@ -0,0 +1,199 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.dashboard import invalidate_class_subjects, invalidate_school_counts
+from accounts.scope import invalidate_scopes
+from accounts.models import Class, CustomUser, StudentClass, StudentSubject, Subject, TeacherSubject
+from .inbox import recount_comment_counters
+from .models import Comment, Grade
+from .results import recompute_results
+from .stats import refresh_all_stats
+
+BATCH_SIZE = 2000
+DEFAULT_PASSWORD = 'password123'
+DEFAULT_EMAIL_DOMAIN = 'school.test'
+
+FIRST_NAMES = [
+    'Ada', 'Bola', 'Chinedu', 'Daniel', 'Esther', 'Femi', 'Grace', 'Hassan', 'Ifeoma', 'James',
+    'Kemi', 'Lola', 'Musa', 'Ngozi', 'Olu', 'Peter', 'Quadri', 'Ruth', 'Segun', 'Tolu',
+    'Uche', 'Victor', 'Wale', 'Yemi', 'Zainab',
+]
+LAST_NAMES = [
+    'Adeyemi', 'Bello', 'Chukwu', 'Danjuma', 'Eze', 'Fashola', 'Garba', 'Ibrahim', 'Johnson', 'Kalu',
+    'Lawal', 'Mohammed', 'Nwosu', 'Okafor', 'Okonkwo', 'Oyelaran', 'Salami', 'Taiwo', 'Usman', 'Yusuf',
+]
+COMMENT_MESSAGES = [
+    'Keep up the good work.',
+    'Please see me about your last test.',
+    'Good improvement this term.',
+    'Your exam preparation needs more effort.',
+]
+
+USER_COLUMNS = [
+    'username', 'email', 'password', 'first_name', 'last_name', 'user_type', 'phone', 'address',
+    'is_active', 'is_staff', 'is_superuser', 'date_joined',
+]
+GRADE_COLUMNS = [
+    'student', 'subject', 'teacher', 'test_score', 'exam_score', 'total_score', 'created_at', 'updated_at',
+]
+COMMENT_COLUMNS = ['sender', 'receiver', 'subject', 'comment_type', 'message', 'created_at']
+
+
+class SeedError(Exception):
+    pass
+
+
+def _insert_rows(cursor, model, field_names, rows):
+    """
+    executemany() over ready-made tuples. Per-student rows skip model
+    instances and bulk_create's per-value field preparation, which is
+    where almost all of the time went at 100k students.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in field_names)
+    placeholders = ', '.join(['%s'] * len(field_names))
+    cursor.executemany(
+        f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})',
+        rows,
+    )
+
+
+def _person(rng, number, role, domain, password):
+    return CustomUser(
+        username=f'{role}{number}',
+        email=f'{role}{number}@{domain}',
+        password=password,
+        first_name=rng.choice(FIRST_NAMES),
+        last_name=rng.choice(LAST_NAMES),
+        user_type=role,
+        phone=0,
+    )
+
+
+def seed_school(students=1000, teachers=50, classes=20, subjects=10, graded_ratio=0.9,
+                comments_per_student=1, seed=1, batch_size=BATCH_SIZE, password=DEFAULT_PASSWORD,
+                email_domain=DEFAULT_EMAIL_DOMAIN, compute_results=True, progress=None):
+    """
+    Generate a synthetic school with bulk inserts, identical for the same
+    arguments. Every student is in one class and takes every subject; each
+    class/subject pair has one teacher. All accounts share one password
+    hash so no per-user PBKDF2 work is done. Classes, subjects, teachers
+    and assignments go through bulk_create; students are written
+    `batch_size` at a time together with their enrolments, grades and
+    comments, which keeps memory flat at any scale.
+    """
+    if min(teachers, classes, subjects) < 1:
+        raise SeedError('Need at least one teacher, class and subject')
+    if CustomUser.objects.filter(email__iendswith=f'@{email_domain}').exists():
+        raise SeedError(f'Users with @{email_domain} emails already exist; pick another email domain')
+    subject_codes = [f'S{number + 1:03d}' for number in range(subjects)]
+    if Subject.objects.filter(code__in=subject_codes).exists():
+        raise SeedError('Subjects with the generated codes (S001, S002, ...) already exist')
+
+    rng = random.Random(seed)
+    password_hash = make_password(password)
+    report = progress or (lambda message: None)
+    counts = {'students': 0, 'teachers': teachers, 'classes': classes, 'subjects': subjects,
+              'grades': 0, 'comments': 0}
+
+    with transaction.atomic():
+        admin = _person(rng, 0, 'admin', email_domain, password_hash)
+        admin.save()
+
+        class_objs = Class.objects.bulk_create([
+            Class(name=f'Class {number + 1}') for number in range(classes)
+        ])
+        subject_objs = Subject.objects.bulk_create([
+            Subject(name=f'Subject {number + 1}', code=code) for number, code in enumerate(subject_codes)
+        ])
+        teacher_objs = CustomUser.objects.bulk_create(
+            [_person(rng, number, 'teacher', email_domain, password_hash) for number in range(teachers)],
+            batch_size=batch_size,
+        )
+
+        teacher_for = {}
+        for class_index, class_obj in enumerate(class_objs):
+            for subject_index, subject in enumerate(subject_objs):
+                teacher_for[class_obj.id, subject.id] = teacher_objs[(class_index * subjects + subject_index) % teachers]
+        TeacherSubject.objects.bulk_create([
+            TeacherSubject(teacher=teacher, subject_id=subject_id, class_assigned_id=class_id)
+            for (class_id, subject_id), teacher in teacher_for.items()
+        ], batch_size=batch_size)
+
+    ops = connection.ops
+    now = ops.adapt_datetimefield_value(timezone.now())
+    for start in range(0, students, batch_size):
+        numbers = range(start, min(start + batch_size, students))
+        with transaction.atomic(), connection.cursor() as cursor:
+            last_id = CustomUser.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            usernames = [f'student{number}' for number in numbers]
+            _insert_rows(cursor, CustomUser, USER_COLUMNS, [
+                (username, f'{username}@{email_domain}', password_hash, rng.choice(FIRST_NAMES),
+                 rng.choice(LAST_NAMES), 'student', 0, '', True, False, False, now)
+                for username in usernames
+            ])
+            student_ids = dict(CustomUser.objects.filter(
+                id__gt=last_id, user_type='student', email__iendswith=f'@{email_domain}'
+            ).values_list('username', 'id'))
+            class_for = {
+                student_ids[username]: class_objs[number % classes].id
+                for number, username in zip(numbers, usernames)
+            }
+
+            _insert_rows(cursor, StudentClass, ['student', 'class_assigned'], list(class_for.items()))
+            enrolments = StudentClass.objects.filter(
+                student_id__gte=min(class_for), student_id__lte=max(class_for)
+            ).values_list('id', 'student_id')
+            _insert_rows(cursor, StudentSubject, ['student_class', 'subject'], [
+                (enrolment_id, subject.id)
+                for enrolment_id, _ in enrolments
+                for subject in subject_objs
+            ])
+
+            grades = []
+            comments = []
+            for student_id, class_id in class_for.items():
+                for subject in subject_objs:
+                    if rng.random() >= graded_ratio:
+                        continue
+                    test_score = rng.randint(0, 40)
+                    exam_score = rng.randint(0, 60)
+                    grades.append((
+                        student_id, subject.id, teacher_for[class_id, subject.id].id,
+                        ops.adapt_decimalfield_value(Decimal(test_score), 5, 2),
+                        ops.adapt_decimalfield_value(Decimal(exam_score), 5, 2),
+                        ops.adapt_decimalfield_value(Decimal(test_score + exam_score), 5, 2),
+                        now, now,
+                    ))
+                for _ in range(comments_per_student):
+                    subject = rng.choice(subject_objs)
+                    comments.append((
+                        teacher_for[class_id, subject.id].id, student_id, subject.id,
+                        'teacher_to_student', rng.choice(COMMENT_MESSAGES), now,
+                    ))
+            _insert_rows(cursor, Grade, GRADE_COLUMNS, grades)
+            _insert_rows(cursor, Comment, COMMENT_COLUMNS, comments)
+
+        counts['students'] += len(usernames)
+        counts['grades'] += len(grades)
+        counts['comments'] += len(comments)
+        report(f"{counts['students']}/{students} students")
+
+    # Bulk inserts send no signals
+    invalidate_school_counts()
+    invalidate_class_subjects()
+    invalidate_scopes()
+    recount_comment_counters()
+
+    if compute_results:
+        # bulk_create skips the signals that normally keep these in step
+        recompute_results()
+        refresh_all_stats()
+    counts['admin_email'] = admin.email
+    return counts
@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import StudentClass
+from .analytics import invalidate_school_report
+from .comment_stream import comment_broker
+from .inbox import apply_comment_delta, comment_payload
+from .models import Comment, Grade
+from .ranking import invalidate_class_ranks
+from .results import apply_grade_delta, recompute_results
+from .stats import refresh_stats_for_classes, refresh_stats_for_student
+
+
+def _stored_grade(instance):
+    """The (student_id, total_score) the database holds for this grade, locked when in a transaction."""
+    if instance.pk is None:
+        return None
+    grades = Grade.objects.filter(pk=instance.pk)
+    if transaction.get_connection().in_atomic_block:
+        grades = grades.select_for_update()
+    return grades.values_list('student_id', 'total_score').first()
+
+
+@receiver(pre_save, sender=Grade)
+def remember_stored_grade(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._stored_grade = _stored_grade(instance)
+
+
+@receiver(post_save, sender=Grade)
+def apply_saved_grade(sender, instance, raw=False, **kwargs):
+    if raw:
+        # Fixture loads don't go through pre_save's read, so rebuild from scratch
+        recompute_results([instance.student_id])
+        return
+
+    stored = instance.__dict__.pop('_stored_grade', None)
+    if stored is None:
+        apply_grade_delta(instance.student_id, instance.total_score, 1)
+    elif stored[0] != instance.student_id:
+        apply_grade_delta(stored[0], -stored[1], -1)
+        apply_grade_delta(instance.student_id, instance.total_score, 1)
+    elif instance.total_score != stored[1]:
+        apply_grade_delta(instance.student_id, instance.total_score - stored[1])
+
+
+def _is_grade_delete(origin):
+    return origin is None or isinstance(origin, Grade) or (isinstance(origin, QuerySet) and origin.model is Grade)
+
+
+@receiver(pre_delete, sender=Grade)
+def remember_deleted_grade(sender, instance, origin=None, **kwargs):
+    if _is_grade_delete(origin):
+        instance._stored_grade = _stored_grade(instance)
+        return
+
+    # Cascade from a subject or user: one grouped rebuild per delete() instead of a delta per grade
+    students = getattr(origin, '_grade_students', None)
+    if students is None:
+        students = origin._grade_students = set()
+        transaction.on_commit(lambda: recompute_results(students))
+    students.add(instance.student_id)
+
+
+@receiver(post_delete, sender=Grade)
+def apply_deleted_grade(sender, instance, **kwargs):
+    # Only a row this delete actually removed counts; a concurrent delete already took it off
+    stored = instance.__dict__.pop('_stored_grade', None)
+    if stored is not None:
+        apply_grade_delta(stored[0], -stored[1], -1)
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def refresh_grade_stats(sender, instance, **kwargs):
+    # Only the (class, subject) groups this grade belongs to need recomputing
+    refresh_stats_for_student(instance.student_id, instance.subject_id)
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def invalidate_grade_ranks(sender, instance, **kwargs):
+    class_ids = list(StudentClass.objects.filter(
+        student_id=instance.student_id
+    ).values_list('class_assigned_id', flat=True))
+    # Wait for the commit so StudentResult deltas are visible to the next reader
+    transaction.on_commit(lambda: invalidate_class_ranks(class_ids))
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def invalidate_grade_report(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_school_report)
+
+
+def _membership_classes(instance):
+    """The assignment's class and, when it was just edited, the class it had before."""
+    return {instance.class_assigned_id, getattr(instance, '_previous_class_id', None)} - {None}
+
+
+@receiver(post_save, sender=StudentClass)
+@receiver(post_delete, sender=StudentClass)
+def invalidate_membership_ranks(sender, instance, **kwargs):
+    class_ids = list(_membership_classes(instance))
+    transaction.on_commit(lambda: invalidate_class_ranks(class_ids))
+
+
+@receiver(post_save, sender=StudentClass)
+@receiver(post_delete, sender=StudentClass)
+def refresh_membership_stats(sender, instance, **kwargs):
+    # A student moving class changes the statistics of the class they left and the one they joined
+    class_ids = _membership_classes(instance)
+    student_ids = {instance.student_id, getattr(instance, '_previous_student_id', None)} - {None}
+    transaction.on_commit(lambda: refresh_stats_for_classes(class_ids, student_ids))
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        apply_comment_delta(instance.receiver_id, received=1, unread=0 if instance.read_at else 1)
+        apply_comment_delta(instance.sender_id, sent=1)
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, **kwargs):
+    # Only processes serving comment streams have anyone to tell
+    if created and comment_broker.is_running():
+        transaction.on_commit(lambda: comment_broker.publish(instance.receiver_id, comment_payload(instance)))
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    # No rebuild when the row is gone: the user is probably being deleted with their comments
+    apply_comment_delta(instance.receiver_id, received=-1, unread=0 if instance.read_at else -1, create=False)
+    apply_comment_delta(instance.sender_id, sent=-1, create=False)
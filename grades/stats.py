@@ -0,0 +1,136 @@
+import math
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from accounts.models import StudentClass
+from .models import ClassSubjectStats, Grade
+
+TWO_PLACES = Decimal('0.01')
+STAT_FIELDS = [
+    'student_count', 'mean_score', 'median_score', 'std_dev',
+    'min_score', 'max_score', 'p25_score', 'p75_score', 'p90_score', 'updated_at',
+]
+
+
+def percentile(sorted_scores, fraction):
+    """Linear-interpolated percentile of an already sorted list."""
+    position = (len(sorted_scores) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_scores[lower]
+    return sorted_scores[lower] + (sorted_scores[upper] - sorted_scores[lower]) * (position - lower)
+
+
+def build_stats(class_id, subject_id, scores):
+    scores = sorted(float(score) for score in scores)
+    count = len(scores)
+    mean = sum(scores) / count
+    variance = sum((score - mean) ** 2 for score in scores) / count
+
+    def dec(value):
+        return Decimal(value).quantize(TWO_PLACES)
+
+    return ClassSubjectStats(
+        class_assigned_id=class_id,
+        subject_id=subject_id,
+        student_count=count,
+        mean_score=dec(mean),
+        median_score=dec(percentile(scores, 0.5)),
+        std_dev=dec(math.sqrt(variance)),
+        min_score=dec(scores[0]),
+        max_score=dec(scores[-1]),
+        p25_score=dec(percentile(scores, 0.25)),
+        p75_score=dec(percentile(scores, 0.75)),
+        p90_score=dec(percentile(scores, 0.9)),
+    )
+
+
+def save_stats(stats):
+    ClassSubjectStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['class_assigned', 'subject'],
+        update_fields=STAT_FIELDS,
+    )
+
+
+def refresh_class_subject_stats(class_id, subject_id):
+    """Recompute the statistics row for one (class, subject) pair."""
+    scores = list(Grade.objects.filter(
+        subject_id=subject_id,
+        student__studentclass__class_assigned_id=class_id,
+    ).values_list('total_score', flat=True))
+
+    with transaction.atomic():
+        if scores:
+            save_stats([build_stats(class_id, subject_id, scores)])
+        else:
+            ClassSubjectStats.objects.filter(class_assigned_id=class_id, subject_id=subject_id).delete()
+
+
+def refresh_stats_for_student(student_id, subject_id):
+    """Refresh every class the student belongs to for this subject."""
+    class_ids = StudentClass.objects.filter(student_id=student_id).values_list('class_assigned_id', flat=True)
+    for class_id in class_ids:
+        refresh_class_subject_stats(class_id, subject_id)
+
+
+def refresh_stats_for_classes(class_ids, student_ids):
+    """
+    Refresh the given classes after students joined or left them: every
+    subject the students have grades in, plus every subject the classes
+    already have statistics for.
+    """
+    subject_ids = set(Grade.objects.filter(student_id__in=student_ids).values_list('subject_id', flat=True))
+    subject_ids.update(ClassSubjectStats.objects.filter(
+        class_assigned_id__in=class_ids
+    ).values_list('subject_id', flat=True))
+    for class_id in class_ids:
+        for subject_id in subject_ids:
+            refresh_class_subject_stats(class_id, subject_id)
+
+
+def refresh_stats_for_grades(student_subject_pairs):
+    """Refresh every (class, subject) group touched by a batch of grade writes."""
+    subjects_by_student = defaultdict(set)
+    for student_id, subject_id in student_subject_pairs:
+        subjects_by_student[student_id].add(subject_id)
+
+    groups = set()
+    memberships = StudentClass.objects.filter(
+        student_id__in=list(subjects_by_student)
+    ).values_list('student_id', 'class_assigned_id')
+    for student_id, class_id in memberships:
+        groups.update((class_id, subject_id) for subject_id in subjects_by_student[student_id])
+
+    for class_id, subject_id in groups:
+        refresh_class_subject_stats(class_id, subject_id)
+    return len(groups)
+
+
+def refresh_all_stats():
+    """Rebuild the whole table from one pass over Grade joined to StudentClass."""
+    rows = Grade.objects.filter(
+        student__studentclass__isnull=False,
+    ).values_list(
+        'student__studentclass__class_assigned_id', 'subject_id', 'total_score',
+    ).iterator(chunk_size=5000)
+
+    groups = defaultdict(list)
+    for class_id, subject_id, total_score in rows:
+        groups[(class_id, subject_id)].append(total_score)
+
+    stats = [build_stats(class_id, subject_id, scores) for (class_id, subject_id), scores in groups.items()]
+    with transaction.atomic():
+        if stats:
+            save_stats(stats)
+        stale_ids = [
+            stats_id
+            for stats_id, class_id, subject_id in ClassSubjectStats.objects.values_list('id', 'class_assigned_id', 'subject_id')
+            if (class_id, subject_id) not in groups
+        ]
+        ClassSubjectStats.objects.filter(id__in=stale_ids).delete()
+    return len(stats)
@@ -0,0 +1,149 @@
+import asyncio
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from accounts.models import Class, CustomUser, StudentClass, Subject, TeacherSubject
+from accounts.scope import get_scope, scope_key
+from .models import Grade
+from .query_plans import check_query_plans
+from .results import find_drifted_results
+
+# Keep tests off the shared on-disk cache
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_user(user_type, name):
+    return CustomUser.objects.create_user(
+        email=f'{name}@example.com', username=name, password=None,
+        user_type=user_type, phone=1, first_name=name.title(), last_name='Test',
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TeacherGradesQueryCountTests(TestCase):
+    """teacher_grades builds the roster in one query, however many students there are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = create_user('teacher', 'teacher')
+        cls.classes = [Class.objects.create(name='JSS1'), Class.objects.create(name='JSS2')]
+        cls.subjects = [Subject.objects.create(name='Maths', code='MAT'), Subject.objects.create(name='English', code='ENG')]
+        for school_class in cls.classes:
+            for subject in cls.subjects:
+                TeacherSubject.objects.create(teacher=cls.teacher, subject=subject, class_assigned=school_class)
+
+    def add_students(self, count):
+        start = CustomUser.objects.filter(user_type='student').count()
+        for number in range(start, start + count):
+            student = create_user('student', f'student{number}')
+            StudentClass.objects.create(student=student, class_assigned=self.classes[number % 2])
+            Grade.objects.create(
+                student=student, subject=self.subjects[0], teacher=self.teacher,
+                test_score=Decimal('20'), exam_score=Decimal('40'),
+            )
+
+    def get_roster(self, expected_students):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('teacher_grades'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['students']), expected_students)
+        return response.context['students']
+
+    def test_query_count_is_independent_of_roster_size(self):
+        self.client.force_login(self.teacher)
+        self.add_students(3)
+        self.get_roster(3)
+        self.add_students(12)
+        students = self.get_roster(15)
+        self.assertTrue(all(student['graded_subjects'] == 1 for student in students))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AddGradePermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = create_user('teacher', 'teacher')
+        cls.student = create_user('student', 'student')
+        cls.subject = Subject.objects.create(name='Maths', code='MAT')
+        school_class = Class.objects.create(name='JSS1')
+        StudentClass.objects.create(student=cls.student, class_assigned=school_class)
+        cls.assignment = TeacherSubject.objects.create(teacher=cls.teacher, subject=cls.subject, class_assigned=school_class)
+
+    def post_grade(self):
+        self.client.force_login(self.teacher)
+        return self.client.post(reverse('add_grade'), {
+            'student': self.student.id, 'subject': self.subject.id, 'test_score': '30', 'exam_score': '50',
+        })
+
+    def test_assigned_teacher_can_add_grade(self):
+        self.post_grade()
+        self.assertTrue(Grade.objects.filter(student=self.student, teacher=self.teacher).exists())
+
+    def test_stale_cached_scope_does_not_grant_write(self):
+        scope = get_scope(self.teacher)
+        self.assignment.delete()
+        # What a process that missed the invalidation would still have cached
+        cache.set(scope_key(self.teacher.id), scope)
+        self.post_grade()
+        self.assertFalse(Grade.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StudentResultDriftTests(TestCase):
+    """Every way of writing or removing a grade keeps StudentResult in step."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = create_user('teacher', 'teacher')
+        cls.subjects = [Subject.objects.create(name='Maths', code='MAT'), Subject.objects.create(name='English', code='ENG')]
+        cls.students = [create_user('student', f'student{number}') for number in range(3)]
+        for student in cls.students:
+            for subject in cls.subjects:
+                Grade.objects.create(
+                    student=student, subject=subject, teacher=cls.teacher,
+                    test_score=Decimal('20'), exam_score=Decimal('40'),
+                )
+
+    def assertNoDrift(self):
+        self.assertEqual(list(find_drifted_results()), [])
+
+    def test_edits_and_direct_deletes(self):
+        grade = Grade.objects.filter(student=self.students[0]).first()
+        grade.exam_score = Decimal('10')
+        grade.save()
+        self.assertNoDrift()
+        grade.delete()
+        Grade.objects.filter(student=self.students[1]).delete()
+        self.assertNoDrift()
+
+    def test_cascading_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subjects[0].delete()
+        self.assertNoDrift()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher.delete()
+        self.assertNoDrift()
+
+
+class QueryPlanTests(TestCase):
+    """The hot queries in query_plans must keep using their indexes."""
+
+    def test_hot_queries_do_not_scan(self):
+        for hot_query, plan, problems, uses_index in check_query_plans():
+            with self.subTest(hot_query.name):
+                self.assertEqual(problems, [], plan)
+
+
+class AsgiURLConfTests(SimpleTestCase):
+    """The ASGI URLconf swaps in async views without moving any page."""
+
+    def test_async_views_keep_the_sync_paths(self):
+        for name, args in [('dashboard', []), ('student_results', []), ('subject_grades', [1]), ('admin_student_grades', [1])]:
+            with self.subTest(name):
+                path = reverse(name, args=args)
+                self.assertEqual(reverse(name, args=args, urlconf='grading_system.asgi_urls'), path)
+                self.assertFalse(asyncio.iscoroutinefunction(resolve(path).func))
+                self.assertTrue(asyncio.iscoroutinefunction(resolve(path, urlconf='grading_system.asgi_urls').func))
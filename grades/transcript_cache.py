@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .transcripts import TEMPLATE_VERSION, collect_transcript_data, get_school, render_transcript_pdf
+
+
+def cache_dir():
+    return Path(getattr(settings, 'TRANSCRIPT_CACHE_DIR', Path(settings.BASE_DIR) / 'transcript_cache'))
+
+
+def max_cache_bytes():
+    return getattr(settings, 'TRANSCRIPT_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+
+
+def transcript_fingerprint(transcript, school, title):
+    """Hash of everything that ends up on the PDF, so equal content shares a file."""
+    payload = json.dumps(
+        {
+            'transcript': transcript,
+            'school': school and {'name': school['name'], 'version': school['version']},
+            'title': title,
+            'template': TEMPLATE_VERSION,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def open_transcript(student_id, title='OFFICIAL STUDENT RESULT'):
+    """
+    Return an open binary file with the student's transcript, rendering it
+    only when no PDF with the same fingerprint is cached. Serving a hit
+    needs only the read queries behind the fingerprint.
+    """
+    transcript = collect_transcript_data(student_ids=[student_id])[0]
+    school = get_school()
+    path = cache_dir() / f'{transcript_fingerprint(transcript, school, title)}.pdf'
+
+    try:
+        pdf_file = open(path, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        # mtime doubles as the last-used time for LRU eviction
+        os.utime(path)
+        return pdf_file
+
+    write_atomic(path, render_transcript_pdf(transcript, school, title=title))
+    pdf_file = open(path, 'rb')
+    evict(max_cache_bytes())
+    return pdf_file
+
+
+def write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def cached_files():
+    """(mtime, size, path) for every cached PDF, least recently used first."""
+    directory = cache_dir()
+    if not directory.is_dir():
+        return []
+    files = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.pdf') and entry.is_file():
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+    return files
+
+
+def evict(max_bytes):
+    """Delete least recently used PDFs until the cache fits in max_bytes."""
+    files = cached_files()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def purge():
+    """Delete every cached PDF; open handles keep working until closed."""
+    return evict(0)
@@ -0,0 +1,338 @@
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+from django.utils.text import slugify
+from PIL import Image as PILImage
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from accounts.models import CustomUser, StudentClass
+from .models import Grade, SchoolSettings, StudentResult
+from .ranking import get_class_ranks
+
+# Bump whenever the transcript layout changes so cached PDFs are not reused
+TEMPLATE_VERSION = 1
+
+# Per-process caches: the decoded logo and the stylesheet are built once
+# and reused by every transcript
+_logo_cache = {}
+_styles = {}
+
+
+class PreloadedImage(Image):
+    """Image flowable over in-memory JPEG bytes, so nothing is read from disk."""
+
+    def __init__(self, data, width=None, height=None):
+        self._img = ImageReader(io.BytesIO(data))
+        super().__init__(io.BytesIO(), width=width, height=height)
+
+
+def school_settings_version(name, logo_path):
+    """
+    Token derived from what the transcript header shows: the school name,
+    the logo file and its modification time. Every process computes the
+    same value, and it survives restarts, so it is safe to use in cache
+    keys and transcript fingerprints.
+    """
+    try:
+        logo_mtime = os.stat(logo_path).st_mtime_ns if logo_path else None
+    except OSError:
+        logo_mtime = None
+    return hashlib.sha256(json.dumps([name, logo_path, logo_mtime]).encode()).hexdigest()[:16]
+
+
+def get_school():
+    """Plain, picklable school header data for the renderer."""
+    school = SchoolSettings.objects.first()
+    if not school:
+        return None
+    logo_path = None
+    if school.logo:
+        try:
+            logo_path = school.logo.path
+        except Exception:
+            logo_path = None
+    return {
+        'name': school.name,
+        'logo_path': logo_path,
+        'version': school_settings_version(school.name, logo_path),
+    }
+
+
+def get_logo(school):
+    """
+    Decode the logo once per process and school settings version, flattened
+    onto white and re-encoded as JPEG. ReportLab embeds JPEG data as-is,
+    so each transcript skips re-compressing the raw pixels.
+    """
+    key = (school['logo_path'], school['version'])
+    if _logo_cache.get('key') != key:
+        try:
+            with PILImage.open(school['logo_path']) as image:
+                image = image.convert('RGBA')
+                flattened = PILImage.new('RGB', image.size, 'white')
+                flattened.paste(image, mask=image.getchannel('A'))
+            encoded = io.BytesIO()
+            flattened.save(encoded, 'JPEG', quality=90)
+            logo = encoded.getvalue()
+        except Exception:
+            logo = None
+        _logo_cache.update(key=key, logo=logo)
+    return _logo_cache['logo']
+
+
+def get_styles():
+    if not _styles:
+        sample = getSampleStyleSheet()
+        _styles.update(
+            normal=sample['Normal'],
+            school_name=ParagraphStyle(
+                'SchoolName',
+                parent=sample['Heading2'],
+                fontSize=14,
+                alignment=1,  # Center
+                spaceAfter=10
+            ),
+            title=ParagraphStyle(
+                'CustomTitle',
+                parent=sample['Heading1'],
+                fontSize=18,
+                spaceAfter=30,
+                alignment=1,  # Center alignment
+            ),
+        )
+    return _styles
+
+
+HEADER_TABLE_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+INFO_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+])
+
+
+def collect_transcript_data(class_id=None, student_ids=None):
+    """
+    Gather everything the transcripts need in a handful of bulk queries and
+    return it as plain dicts, so rendering never touches the database.
+    """
+    students = CustomUser.objects.filter(user_type='student')
+    if class_id is not None:
+        students = students.filter(studentclass__class_assigned_id=class_id)
+    if student_ids is not None:
+        students = students.filter(id__in=list(student_ids))
+
+    transcripts = {
+        student_id: {
+            'id': student_id,
+            'name': f'{first_name} {last_name}'.strip(),
+            'email': email,
+            'class_id': None,
+            'class_name': None,
+            'grades': [],
+            'total_subjects': 0,
+            'average_score': 0,
+            'positions': {'overall': None, 'class_size': 0, 'subjects': {}},
+        }
+        for student_id, first_name, last_name, email in students.order_by('id').values_list(
+            'id', 'first_name', 'last_name', 'email'
+        )
+    }
+
+    memberships = StudentClass.objects.filter(student__in=students).values_list(
+        'student_id', 'class_assigned_id', 'class_assigned__name'
+    )
+    for student_id, member_class_id, class_name in memberships:
+        transcripts[student_id].update(class_id=member_class_id, class_name=class_name)
+
+    grades = Grade.objects.filter(student__in=students).order_by('student_id', 'subject__name').values_list(
+        'student_id', 'subject_id', 'subject__name', 'test_score', 'exam_score', 'total_score'
+    )
+    for student_id, subject_id, subject_name, test_score, exam_score, total_score in grades:
+        transcripts[student_id]['grades'].append({
+            'subject_id': subject_id,
+            'subject': subject_name,
+            'test_score': test_score,
+            'exam_score': exam_score,
+            'total_score': total_score,
+        })
+
+    results = StudentResult.objects.filter(student__in=students).values_list(
+        'student_id', 'total_subjects', 'average_score'
+    )
+    for student_id, total_subjects, average_score in results:
+        transcripts[student_id].update(total_subjects=total_subjects, average_score=average_score)
+
+    # One cached rank map per class
+    by_class = defaultdict(list)
+    for transcript in transcripts.values():
+        if transcript['class_id'] is not None:
+            by_class[transcript['class_id']].append(transcript)
+    for member_class_id, members in by_class.items():
+        ranks = get_class_ranks(member_class_id)
+        for transcript in members:
+            transcript['positions'] = {
+                'overall': ranks['overall'].get(transcript['id']),
+                'class_size': ranks['class_size'],
+                'subjects': ranks['subjects'].get(transcript['id'], {}),
+            }
+
+    return list(transcripts.values())
+
+
+def render_transcript_pdf(transcript, school, title='OFFICIAL STUDENT RESULT'):
+    """Render one transcript from plain data and return the PDF bytes."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = get_styles()
+    elements = []
+
+    # School Logo and Name
+    if school:
+        header_table_data = []
+        if school['logo_path']:
+            logo = get_logo(school)
+            header_table_data.append([PreloadedImage(logo, width=2*inch, height=1*inch) if logo else ''])
+        header_table_data.append([Paragraph(school['name'], styles['school_name'])])
+        header_table = Table(header_table_data, colWidths=[2*inch, 4*inch])
+        header_table.setStyle(HEADER_TABLE_STYLE)
+        elements.append(header_table)
+        elements.append(Spacer(1, 20))
+
+    elements.append(Paragraph(title, styles['title']))
+    elements.append(Spacer(1, 12))
+
+    # Student information
+    student_info = [
+        ['Student Name:', transcript['name']],
+        ['Student ID:', str(transcript['id'])],
+        ['Email:', transcript['email']],
+        ['Class:', transcript['class_name'] or 'Not Assigned'],
+    ]
+    info_table = Table(student_info, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(INFO_TABLE_STYLE)
+    elements.append(info_table)
+    elements.append(Spacer(1, 20))
+
+    # Grades table
+    positions = transcript['positions']
+    if transcript['grades']:
+        grade_data = [['Subject', 'Test Score', 'Exam Score', 'Total Score', 'Position']]
+        for grade in transcript['grades']:
+            grade_data.append([
+                grade['subject'],
+                f"{grade['test_score']}",
+                f"{grade['exam_score']}",
+                f"{grade['total_score']}",
+                f"{positions['subjects'].get(grade['subject_id'], '-')}",
+            ])
+        last_subject_row = len(grade_data) - 1
+
+        # Add summary row
+        grade_data.append(['', '', '', '', ''])  # Empty row
+        grade_data.append(['SUMMARY', '', '', '', ''])
+        grade_data.append(['Total Subjects:', str(transcript['total_subjects']), '', '', ''])
+        grade_data.append(['Average Score:', f"{transcript['average_score']:.2f}%", '', '', ''])
+        if positions['overall']:
+            grade_data.append(['Class Position:', f"{positions['overall']} of {positions['class_size']}", '', '', ''])
+
+        grade_table = Table(grade_data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch, 1*inch])
+        grade_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (0, 1), (-1, last_subject_row), colors.beige),
+            ('BACKGROUND', (0, last_subject_row + 1), (-1, -1), colors.lightgrey),
+            ('FONTNAME', (0, last_subject_row + 1), (-1, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, last_subject_row), 1, colors.black),
+        ]))
+        elements.append(grade_table)
+    else:
+        elements.append(Paragraph("No grades available", styles['normal']))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def transcript_filename(transcript):
+    return f"{transcript['id']}_{slugify(transcript['name']) or 'student'}_transcript.pdf"
+
+
+def _render_job(args):
+    transcript, school = args
+    started = time.perf_counter()
+    pdf = render_transcript_pdf(transcript, school)
+    return transcript_filename(transcript), pdf, time.perf_counter() - started
+
+
+def render_transcripts(transcripts, school, workers=None):
+    """
+    Yield (filename, pdf_bytes, seconds) for each transcript, rendering
+    across a process pool. Workers only receive plain data, so they never
+    open a database connection.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [(transcript, school) for transcript in transcripts]
+    if workers == 1 or len(jobs) <= 1:
+        yield from map(_render_job, jobs)
+        return
+
+    # Don't hand open database connections to forked children
+    connections.close_all()
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        yield from pool.map(_render_job, jobs, chunksize=chunksize)
+
+
+def generate_transcripts(output, class_id=None, student_ids=None, workers=None, as_zip=True):
+    """
+    Render transcripts for a class, a set of students or the whole school
+    and write them into a ZIP (output is a path or file object) or into
+    the directory at output. Returns timing statistics.
+    """
+    started = time.perf_counter()
+    transcripts = collect_transcript_data(class_id=class_id, student_ids=student_ids)
+    school = get_school()
+    prefetch_seconds = time.perf_counter() - started
+
+    file_times = []
+    if as_zip:
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for filename, pdf, seconds in render_transcripts(transcripts, school, workers):
+                archive.writestr(filename, pdf)
+                file_times.append(seconds)
+    else:
+        os.makedirs(output, exist_ok=True)
+        for filename, pdf, seconds in render_transcripts(transcripts, school, workers):
+            with open(os.path.join(output, filename), 'wb') as pdf_file:
+                pdf_file.write(pdf)
+            file_times.append(seconds)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'count': len(file_times),
+        'elapsed': elapsed,
+        'prefetch_seconds': prefetch_seconds,
+        'files_per_second': len(file_times) / elapsed if elapsed else 0,
+        'mean_file_seconds': sum(file_times) / len(file_times) if file_times else 0,
+        'max_file_seconds': max(file_times, default=0),
+    }
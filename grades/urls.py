@@ -7,6 +7,7 @@ urlpatterns = [
     path('teacher/add/', views.add_grade, name='add_grade'),
     path('teacher/add/<int:class_id>/<int:subject_id>/', views.add_grade, name='add_grade_for_class_subject'),
     path('teacher/assign-grade/', views.teacher_assigned_classes_subjects, name='teacher_assigned_classes'),
+    path('teacher/gradebook/<int:class_id>/<int:subject_id>/', views.class_gradebook, name='class_gradebook'),
     path('teacher/edit/<int:grade_id>/', views.edit_grade, name='edit_grade'),
     path('teacher/delete/<int:grade_id>/', views.delete_grade, name='delete_grade'),
     path('student-grades/<int:student_id>/', views.student_grades_detail, name='student_grades_detail'),
@@ -18,11 +19,24 @@ urlpatterns = [
     # Comments
     path('comments/', views.comments, name='comments'),
     path('comments/add/', views.add_comment, name='add_comment'),
+    path('comments/updates/', views.comment_updates, name='comment_updates'),
+    path('comments/stream/', views.comment_stream, name='comment_stream'),
     
     # Admin URLs
     path('admin/results/', views.admin_student_results, name='admin_student_results'),
     path('subjects/<int:subject_id>/grades/', views.subject_grades, name='subject_grades'),
     path('admin/student/<int:student_id>/grades/', views.admin_student_grades, name='admin_student_grades'),
     path('admin/student/<int:student_id>/download-pdf/', views.admin_download_student_pdf, name='admin_download_student_pdf'),
+    path('statistics/', views.class_statistics, name='class_statistics'),
+    path('admin/analytics/', views.analytics_report, name='analytics_report'),
+    path('admin/metrics/', views.request_metrics, name='request_metrics'),
+    path('admin/import-grades/', views.import_grades_upload, name='import_grades'),
+    path('admin/export-grades/', views.export_grades_csv, name='export_grades_csv'),
+    path('admin/transcripts/', views.admin_batch_transcripts, name='admin_batch_transcripts'),
+    
+    # Background jobs
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/status/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
      
 ]
@@ -1,22 +1,33 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse, JsonResponse
-from django.db.models import Q
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import Image
-from .models import SchoolSettings
-from reportlab.lib import colors
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.db import transaction
+from django.db.models import F, Q
 from django.db.models import Count
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-import io
+import os
+import uuid
 
-from .models import Grade, Comment, StudentResult
-from .forms import GradeForm, CommentForm
-from accounts.models import CustomUser, Subject, TeacherSubject, StudentClass, StudentSubject
+from .models import Grade, Comment, StudentResult, ClassSubjectStats, Job
+from .forms import GradeForm, CommentForm, GradebookFormSet, GradeImportForm
+from .exporter import export_csv_lines
+from .transcript_cache import open_transcript
+from .jobs import enqueue, job_output_dir
+from .bulk import refresh_after_grade_writes, upsert_grades
+from .analytics import get_cached_school_report
+from .ranking import get_student_positions
+from .comment_stream import comment_events
+from .inbox import INBOX_ORDERING, comment_payload, comments_since, get_comment_counter, latest_cursor, mark_read, updates_etag
+from grading_system.middleware import metrics_snapshot
+from accounts.autocomplete import people_matching
+from accounts.decorators import aget_user
+from accounts.pagination import keyset_paginate
+from accounts.scope import get_scope, students_in_classes, subjects_for_student
+from accounts.models import Class, CustomUser, Subject, TeacherSubject, StudentClass, StudentSubject
+
+MAX_REPORTED_IMPORT_ERRORS = 100
 
 # Teacher Views
 @login_required
@@ -25,44 +36,37 @@ def teacher_grades(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    # Get students in classes where teacher is assigned
-    students = CustomUser.objects.filter(
-        user_type='student',
-        studentclass__isnull=False,
-        studentclass__class_assigned__teachersubject__teacher=request.user
-    ).distinct().prefetch_related(
-        'studentclass_set',
-        'grade_set'
-    ).order_by('first_name')
-    
-    # Prepare student data with accurate counts
+    # One row per student/class pair the teacher teaches, with the number of
+    # the student's grades this teacher gave in subjects they teach that class
+    roster = StudentClass.objects.filter(
+        student__user_type='student',
+        class_assigned__teachersubject__teacher=request.user
+    ).values(
+        'id', 'student_id', 'student__first_name', 'student__last_name', 'class_assigned__name'
+    ).annotate(
+        graded_subjects=Count(
+            'student__grade',
+            filter=Q(
+                student__grade__teacher=request.user,
+                student__grade__subject=F('class_assigned__teachersubject__subject')
+            ),
+            distinct=True
+        )
+    ).order_by('student__first_name', 'student_id', 'id')
+    
     student_data = []
-    for student in students:
-        try:
-            student_class = student.studentclass_set.first()
-            if not student_class:
-                continue
-                
-            # Get subjects teacher teaches in this class
-            teacher_subjects = TeacherSubject.objects.filter(
-                teacher=request.user,
-                class_assigned=student_class.class_assigned
-            ).values_list('subject', flat=True)
-            
-            # Count grades for these subjects
-            graded_count = student.grade_set.filter(
-                teacher=request.user,
-                subject__in=teacher_subjects
-            ).count()
-            
-            student_data.append({
-                'id': student.id,
-                'full_name': student.get_full_name(),
-                'graded_subjects': graded_count,
-                'class_name': student_class.class_assigned.name
-            })
-        except Exception:
+    seen = set()
+    for row in roster:
+        # A student in several of the teacher's classes is listed once
+        if row['student_id'] in seen:
             continue
+        seen.add(row['student_id'])
+        student_data.append({
+            'id': row['student_id'],
+            'full_name': f"{row['student__first_name']} {row['student__last_name']}".strip(),
+            'graded_subjects': row['graded_subjects'],
+            'class_name': row['class_assigned__name']
+        })
     
     return render(request, 'grades/teacher_grades.html', {
         'students': student_data
@@ -117,13 +121,10 @@ def add_grade(request, class_id=None, subject_id=None):
     if request.method == 'POST':
         form = GradeForm(request.POST, teacher=request.user)
         if form.is_valid():
-            grade = form.save(commit=False)
-            grade.teacher = request.user
-            grade.save()
-            
-            # Update student result
-            student_result, created = StudentResult.objects.get_or_create(student=grade.student)
-            student_result.calculate_result()
+            with transaction.atomic():
+                grade = form.save(commit=False)
+                grade.teacher = request.user
+                grade.save()
             
             messages.success(request, 'Grade added successfully')
             return redirect('teacher_grades')
@@ -132,26 +133,20 @@ def add_grade(request, class_id=None, subject_id=None):
         
         # If specific class and subject are provided
         if class_id and subject_id:
-            try:
-                # Verify this teacher is actually assigned to this class and subject
-                TeacherSubject.objects.get(
-                    teacher=request.user,
-                    class_assigned_id=class_id,
-                    subject_id=subject_id
-                )
-                
-                # Filter the form
-                form.fields['subject'].queryset = Subject.objects.filter(id=subject_id)
-                form.fields['student'].queryset = CustomUser.objects.filter(
-                    user_type='student',
-                    studentclass__class_assigned_id=class_id
-                )
-                
-                # Set initial subject
-                form.initial['subject'] = subject_id
-            except TeacherSubject.DoesNotExist:
+            # Verify this teacher is actually assigned to this class and subject
+            if not TeacherSubject.objects.filter(
+                teacher=request.user, class_assigned_id=class_id, subject_id=subject_id
+            ).exists():
                 messages.error(request, 'You are not assigned to teach this subject in this class')
-                return redirect('teacher_assigned_classes_subjects')
+                return redirect('teacher_assigned_classes')
+            
+            # Filter the form
+            form.fields['subject'].queryset = Subject.objects.filter(id=subject_id)
+            form.fields['student'].queryset = students_in_classes([class_id])
+            form.fields['student'].widget.query = {'class': class_id}
+            
+            # Set initial subject
+            form.initial['subject'] = subject_id
     
     return render(request, 'grades/add_grade.html', {
         'form': form,
@@ -160,6 +155,74 @@ def add_grade(request, class_id=None, subject_id=None):
     })
 
 
+@login_required
+def class_gradebook(request, class_id, subject_id):
+    if request.user.user_type != 'teacher':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    # Verify this teacher is actually assigned to this class and subject
+    assignment = TeacherSubject.objects.filter(
+        teacher=request.user,
+        class_assigned_id=class_id,
+        subject_id=subject_id
+    ).select_related('class_assigned', 'subject').first()
+    if not assignment:
+        messages.error(request, 'You are not assigned to teach this subject in this class')
+        return redirect('teacher_assigned_classes')
+    
+    students = list(CustomUser.objects.filter(
+        user_type='student',
+        studentclass__class_assigned_id=class_id
+    ).order_by('first_name', 'last_name'))
+    existing = {
+        grade.student_id: grade
+        for grade in Grade.objects.filter(subject_id=subject_id, student__in=students)
+    }
+    
+    if request.method == 'POST':
+        formset = GradebookFormSet(request.POST)
+        roster_ids = {student.id for student in students}
+        if formset.is_valid():
+            grades = []
+            for row in formset.cleaned_data:
+                if row.get('test_score') is None or row['student_id'] not in roster_ids:
+                    continue
+                grades.append(Grade(
+                    student_id=row['student_id'],
+                    subject_id=subject_id,
+                    teacher=request.user,
+                    test_score=row['test_score'],
+                    exam_score=row['exam_score'],
+                ))
+            
+            # One upsert for the whole class, then one set-based refresh
+            with transaction.atomic():
+                upsert_grades(grades)
+                refresh_after_grade_writes((grade.student_id, grade.subject_id) for grade in grades)
+            
+            messages.success(request, f'Saved {len(grades)} grade(s)')
+            return redirect('teacher_grades')
+    else:
+        formset = GradebookFormSet(initial=[
+            {
+                'student_id': student.id,
+                'test_score': existing[student.id].test_score if student.id in existing else None,
+                'exam_score': existing[student.id].exam_score if student.id in existing else None,
+            }
+            for student in students
+        ])
+    
+    students_by_id = {str(student.id): student for student in students}
+    rows = [(students_by_id.get(str(form['student_id'].value())), form) for form in formset.forms]
+    
+    return render(request, 'grades/class_gradebook.html', {
+        'assignment': assignment,
+        'rows': rows,
+        'formset': formset
+    })
+
+
 @login_required
 def student_grades_detail(request, student_id):
     if request.user.user_type != 'teacher':
@@ -168,30 +231,21 @@ def student_grades_detail(request, student_id):
     
     student = get_object_or_404(CustomUser, id=student_id, user_type='student')
     
-    # Get the student's class
-    try:
-        student_class = StudentClass.objects.get(student=student)
-    except StudentClass.DoesNotExist:
-        messages.error(request, 'Student is not assigned to any class')
+    scope = get_scope(request.user)
+    if student.id not in scope['student_ids']:
+        messages.error(request, 'Student is not in any of your classes')
         return redirect('teacher_grades')
     
-    # Get subjects the teacher is assigned to teach in this class
-    teacher_subjects = TeacherSubject.objects.filter(
-        teacher=request.user,
-        class_assigned=student_class.class_assigned
-    ).values_list('subject', flat=True)
-    
-    # Get grades for these specific subjects
+    # Grades for the subjects this teacher teaches in the student's class
     grades = Grade.objects.filter(
         teacher=request.user,
         student=student,
-        subject__in=teacher_subjects
-    ).order_by('subject__name')
+        subject_id__in=subjects_for_student(scope, student.id)
+    ).select_related('subject').order_by('subject__name')
     
     return render(request, 'grades/student_grades_detail.html', {
         'student': student,
-        'grades': grades,
-        'student_class': student_class
+        'grades': grades
     })
 
 @login_required
@@ -203,16 +257,14 @@ def edit_grade(request, grade_id):
     grade = get_object_or_404(Grade, id=grade_id, teacher=request.user)
     
     if request.method == 'POST':
-        form = GradeForm(request.POST, instance=grade, teacher=request.user)
-        if form.is_valid():
-            form.save()
-            
-            # Update student result
-            student_result, created = StudentResult.objects.get_or_create(student=grade.student)
-            student_result.calculate_result()
-            
-            messages.success(request, 'Grade updated successfully')
-            return redirect('teacher_grades')
+        with transaction.atomic():
+            # Re-read under a lock so overlapping edits don't save over a stale copy
+            grade = get_object_or_404(Grade.objects.select_for_update(), id=grade_id, teacher=request.user)
+            form = GradeForm(request.POST, instance=grade, teacher=request.user)
+            if form.is_valid():
+                form.save()
+                messages.success(request, 'Grade updated successfully')
+                return redirect('teacher_grades')
     else:
         form = GradeForm(instance=grade, teacher=request.user)
         # Make student and subject fields read-only
@@ -234,14 +286,14 @@ def delete_grade(request, grade_id):
     grade = get_object_or_404(Grade, id=grade_id, teacher=request.user)
     
     if request.method == 'POST':
-        student = grade.student
-        grade.delete()
+        with transaction.atomic():
+            grade = Grade.objects.select_for_update().filter(id=grade.id).first()
+            deleted = grade.delete()[0] if grade else 0
         
-        # Update student result
-        student_result, created = StudentResult.objects.get_or_create(student=student)
-        student_result.calculate_result()
-        
-        messages.success(request, 'Grade deleted successfully')
+        if deleted:
+            messages.success(request, 'Grade deleted successfully')
+        else:
+            messages.error(request, 'Grade was already deleted')
         return redirect('teacher_grades')
     
     return render(request, 'grades/delete_grade.html', {'grade': grade})
@@ -254,14 +306,21 @@ def student_results(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    grades = Grade.objects.filter(student=request.user,).order_by('subject__name')
+    grades = list(Grade.objects.filter(student=request.user,).select_related('subject', 'teacher').order_by('subject__name'))
     student_result, created = StudentResult.objects.get_or_create(student=request.user)
-    if created or not grades.exists():
+    if created or not grades:
         student_result.calculate_result()
     
+    # Positions come from the cached per-class ranking
+    positions = get_student_positions(request.user.id)
+    if positions:
+        for grade in grades:
+            grade.position = positions['subjects'].get(grade.subject_id)
+    
     return render(request, 'grades/student_results.html', {
         'grades': grades,
-        'student_result': student_result
+        'student_result': student_result,
+        'positions': positions
     })
 
 @login_required
@@ -270,147 +329,13 @@ def download_result_pdf(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    # Create the HttpResponse object with PDF headers
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{request.user.get_full_name()}_transcript.pdf"'
-    
-    # Create the PDF object
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-
-    # School Logo and Name
-    try:
-        settings = SchoolSettings.objects.first()
-        if settings:
-            # Create a table for logo and school name
-            header_table_data = []
-            if settings.logo:
-                try:
-                    logo = Image(settings.logo.path, width=2*inch, height=1*inch)
-                    header_table_data.append([logo])
-                except:
-                    header_table_data.append([''])  # Empty cell if logo fails
-            
-            # Add school name
-            school_name_style = ParagraphStyle(
-                'SchoolName',
-                parent=getSampleStyleSheet()['Heading2'],
-                fontSize=14,
-                alignment=1,  # Center
-                spaceAfter=10
-            )
-            school_name = Paragraph(settings.name, school_name_style)
-            header_table_data.append([school_name])
-            
-            # Create header table
-            header_table = Table(header_table_data, colWidths=[2*inch, 4*inch])
-            header_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            elements.append(header_table)
-            elements.append(Spacer(1, 20))
-    except Exception as e:
-        print(f"Error loading school settings: {e}")
-    
-    # The rest of your original code remains exactly the same...
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1,  # Center alignment
+    # Served from the transcript cache; results are already up to date
+    return FileResponse(
+        open_transcript(request.user.id, title='STUDENT RESULT'),
+        as_attachment=True,
+        filename=f'{request.user.get_full_name()}_transcript.pdf',
+        content_type='application/pdf'
     )
-    
-    # Add title
-    title = Paragraph("STUDENT RESULT", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    
-    # Student information
-    student_info = [
-        ['Student Name:', request.user.get_full_name()],
-        ['Student ID:', str(request.user.id)],
-        ['Email:', request.user.email],
-    ]
-    
-    try:
-        student_class = StudentClass.objects.get(student=request.user)
-        student_info.append(['Class:', student_class.class_assigned.name])
-    except StudentClass.DoesNotExist:
-        student_info.append(['Class:', 'Not Assigned'])
-    
-    info_table = Table(student_info, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-    ]))
-    
-    elements.append(info_table)
-    elements.append(Spacer(1, 20))
-    
-    # Grades table
-    grades = Grade.objects.filter(student=request.user).order_by('subject__name')
-    subject_count = grades.count()
-
-    if grades.exists():
-        grade_data = [['Subject', 'Test Score', 'Exam Score', 'Total Score']]
-        
-        for grade in grades:
-            grade_data.append([
-                grade.subject.name,
-                str(grade.test_score),
-                str(grade.exam_score),
-                str(grade.total_score),
-            ])
-        
-        # Add summary row
-        student_result, created = StudentResult.objects.get_or_create(student=request.user)
-        student_result.calculate_result()
-        
-        grade_data.append(['', '', '', ''])  # Empty row
-        grade_data.append(['SUMMARY', '', '', ''])
-        grade_data.append(['Total Subjects:', str(student_result.total_subjects), '', ''])
-        grade_data.append(['Average Score:', str(round(student_result.average_score, 2)), '', ''])
-         
-        last_subject_row = subject_count   
-        empty_row = subject_count + 1      
-        summary_start = subject_count + 2 
-
-        grade_table = Table(grade_data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch])
-        grade_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (0, 1), (-1, last_subject_row), colors.beige),
-            ('BACKGROUND', (0, empty_row), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, summary_start), (-1, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, last_subject_row), 1, colors.black),
-        ]))
-        
-        elements.append(grade_table)
-    else:
-        no_grades = Paragraph("No grades available", styles['Normal'])
-        elements.append(no_grades)
-    
-    # Build PDF
-    doc.build(elements)
-    
-    # Get the value of the BytesIO buffer and write it to the response
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
-    
-    return response
 
 # Comment Views
 @login_required
@@ -419,14 +344,83 @@ def comments(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    sent_comments = Comment.objects.filter(sender=request.user)
-    received_comments = Comment.objects.filter(receiver=request.user)
+    box = 'sent' if request.GET.get('box') == 'sent' else 'received'
+    if box == 'sent':
+        comments = Comment.objects.filter(sender=request.user).select_related('receiver', 'subject')
+    else:
+        comments = Comment.objects.filter(receiver=request.user).select_related('sender', 'subject')
+    page = keyset_paginate(request, comments, INBOX_ORDERING)
+    
+    if box == 'received':
+        # Rows keep read_at=None for this render so they still show as new
+        mark_read(request.user, [comment.id for comment in page if comment.read_at is None])
     
     return render(request, 'grades/comments.html', {
-        'sent_comments': sent_comments,
-        'received_comments': received_comments
+        'box': box,
+        'page': page,
+        'comments': page,
+        'counter': get_comment_counter(request.user),
+        'since': latest_cursor(request.user),
     })
 
+
+@login_required
+def comment_updates(request):
+    """
+    Comments received after ?since=<cursor>, for polling. Without `since`
+    only the counters and the cursor to start from are returned. Replies
+    carry an ETag from the user's counter row, so an unchanged inbox costs
+    one small query and a 304.
+    """
+    if request.user.user_type == 'admin':
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    since = request.GET.get('since')
+    counter = get_comment_counter(request.user)
+    etag = updates_etag(counter, since)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if since is None:
+            new_comments, cursor, more = [], latest_cursor(request.user), False
+        else:
+            new_comments, cursor, more = comments_since(request.user, since)
+        response = JsonResponse({
+            'unread': counter.unread,
+            'received': counter.received,
+            'sent': counter.sent,
+            'since': cursor,
+            'more': more,
+            'comments': [comment_payload(comment) for comment in new_comments],
+        })
+    response['ETag'] = etag
+    # Make browsers revalidate with If-None-Match instead of reusing a stale reply
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+async def comment_stream(request):
+    """
+    Server-sent events pushing comments to the logged-in user as they are
+    received. Meant to be served over ASGI (grading_system.asgi), where an
+    idle stream is a suspended coroutine rather than a blocked worker.
+    """
+    if 'wsgi.version' in request.META:
+        # Under WSGI every open stream would pin a worker. 204 stops
+        # EventSource from reconnecting and the page falls back to polling.
+        return HttpResponse(status=204)
+    
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if user.user_type == 'admin':
+        return HttpResponse(status=403)
+    
+    after = request.headers.get('Last-Event-ID', request.GET.get('after', ''))
+    return StreamingHttpResponse(
+        comment_events(user.id, int(after) if after.isdigit() else None),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
 @login_required
 def admin_download_student_pdf(request, student_id):
     if request.user.user_type != 'admin':
@@ -435,140 +429,12 @@ def admin_download_student_pdf(request, student_id):
     
     student = get_object_or_404(CustomUser, id=student_id, user_type='student')
     
-    # Create the HttpResponse object with PDF headers
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{student.get_full_name()}_transcript.pdf"'
-    
-    # Create the PDF object
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-
-    # School Logo and Name
-    try:
-        settings = SchoolSettings.objects.first()
-        if settings:
-            # Create a table for logo and school name
-            header_table_data = []
-            if settings.logo:
-                try:
-                    logo = Image(settings.logo.path, width=2*inch, height=1*inch)
-                    header_table_data.append([logo])
-                except:
-                    header_table_data.append([''])  # Empty cell if logo fails
-            
-            # Add school name
-            school_name_style = ParagraphStyle(
-                'SchoolName',
-                parent=getSampleStyleSheet()['Heading2'],
-                fontSize=14,
-                alignment=1,  # Center
-                spaceAfter=10
-            )
-            school_name = Paragraph(settings.name, school_name_style)
-            header_table_data.append([school_name])
-            
-            # Create header table
-            header_table = Table(header_table_data, colWidths=[2*inch, 4*inch])
-            header_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            elements.append(header_table)
-            elements.append(Spacer(1, 20))
-    except Exception as e:
-        print(f"Error loading school settings: {e}")
-    
-    # Rest of your original code remains exactly the same...
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1,  # Center alignment
+    return FileResponse(
+        open_transcript(student.id),
+        as_attachment=True,
+        filename=f'{student.get_full_name()}_transcript.pdf',
+        content_type='application/pdf'
     )
-    
-    # Add title
-    title = Paragraph("OFFICIAL STUDENT RESULT", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    
-    # Student information
-    student_info = [
-        ['Student Name:', student.get_full_name()],
-        ['Student ID:', str(student.id)],
-        ['Email:', student.email],
-    ]
-    
-    try:
-        student_class = StudentClass.objects.get(student=student)
-        student_info.append(['Class:', student_class.class_assigned.name])
-    except StudentClass.DoesNotExist:
-        student_info.append(['Class:', 'Not Assigned'])
-    
-    info_table = Table(student_info, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-    ]))
-    
-    elements.append(info_table)
-    elements.append(Spacer(1, 20))
-    
-    # Grades table
-    grades = Grade.objects.filter(student=student).order_by('subject__name')
-    student_result = StudentResult.objects.get(student=student)
-    
-    if grades.exists():
-        grade_data = [['Subject', 'Test Score', 'Exam Score', 'Total Score']]
-        
-        for grade in grades:
-            grade_data.append([
-                grade.subject.name,
-                f"{grade.test_score}",
-                f"{grade.exam_score}",
-                f"{grade.total_score}",
-             ])
-        
-        # Add summary row
-        grade_data.append(['', '', '', ''])  # Empty row
-        grade_data.append(['SUMMARY', '', '', ''])
-        grade_data.append(['Total Subjects:', str(student_result.total_subjects), '', ''])
-        grade_data.append(['Average Score:', f"{student_result.average_score:.2f}%", '', ''])
-        
-        grade_table = Table(grade_data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch])
-        grade_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (0, 1), (-1, -5), colors.beige),
-            ('BACKGROUND', (0, -4), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, -4), (-1, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -5), 1, colors.black),
-        ]))
-        
-        elements.append(grade_table)
-    else:
-        no_grades = Paragraph("No grades available for this student", styles['Normal'])
-        elements.append(no_grades)
-    
-    # Build PDF
-    doc.build(elements)
-    
-    # Get the value of the BytesIO buffer and write it to the response
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
-    
-    return response
 
 @login_required
 def add_comment(request):
@@ -602,22 +468,37 @@ def admin_student_results(request):
         messages.error(request, 'Access denied')
         return redirect('dashboard')
     
-    students = CustomUser.objects.filter(user_type='student')
+    if request.method == 'POST':
+        job = enqueue('recompute_results', user=request.user)
+        messages.success(request, 'Result recomputation queued')
+        return redirect('job_detail', job_id=job.id)
+    
+    # Results are precomputed; the page only reads them
+    students = CustomUser.objects.filter(user_type='student').select_related('studentresult')
+    search = request.GET.get('q', '').strip()
+    if search:
+        # Prefix matches on the name and email indexes; a substring search would scan every user
+        students = students.filter(id__in=people_matching(search))
+    class_id = request.GET.get('class_id', '')
+    if class_id.isdigit():
+        students = students.filter(studentclass__class_assigned_id=class_id)
+    
+    page = keyset_paginate(request, students, ['first_name', 'last_name', 'id'])
     student_results = []
     
-    for student in students:
-        grades = Grade.objects.filter(student=student)
-        student_result, created = StudentResult.objects.get_or_create(student=student)
-        if created or grades.exists():
-            student_result.calculate_result()
-        
+    for student in page:
         student_results.append({
             'student': student,
-            'result': student_result,
-            'grades': grades
+            'result': getattr(student, 'studentresult', None) or StudentResult(student=student),
         })
     
-    return render(request, 'grades/admin_student_results.html', {'student_results': student_results})
+    return render(request, 'grades/admin_student_results.html', {
+        'student_results': student_results,
+        'page': page,
+        'search': search,
+        'class_id': class_id,
+        'classes': Class.objects.order_by('name'),
+    })
 
 
 @login_required
@@ -627,8 +508,8 @@ def admin_student_grades(request, student_id):
         return redirect('dashboard')
     
     student = get_object_or_404(CustomUser, id=student_id, user_type='student')
-    grades = Grade.objects.filter(student=student).order_by('subject__name')
-    student_result = get_object_or_404(StudentResult, student=student)
+    grades = Grade.objects.filter(student=student).select_related('subject', 'teacher').order_by('subject__name')
+    student_result = StudentResult.objects.filter(student=student).first() or StudentResult(student=student)
     
     return render(request, 'grades/admin_student_grades.html', {
         'student': student,
@@ -652,4 +533,154 @@ def subject_grades(request, subject_id):
     return render(request, 'grades/subject_grades.html', {
         'subject': subject,
         'grades': grades
-    })
\ No newline at end of file
+    })
+
+
+@login_required
+def class_statistics(request):
+    if request.user.user_type not in ['teacher', 'admin']:
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    # Read the materialized rows; they are kept fresh on every grade write
+    stats = ClassSubjectStats.objects.select_related(
+        'class_assigned', 'subject'
+    ).order_by('class_assigned__name', 'subject__name')
+    
+    if request.user.user_type == 'teacher':
+        stats = stats.filter(
+            class_assigned__teachersubject__teacher=request.user,
+            class_assigned__teachersubject__subject=F('subject')
+        )
+    
+    return render(request, 'grades/class_statistics.html', {'stats': stats})
+
+
+@login_required
+def analytics_report(request):
+    if request.user.user_type != 'admin':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    return render(request, 'grades/analytics_report.html', {
+        'report': get_cached_school_report()
+    })
+
+
+@login_required
+def request_metrics(request):
+    if request.user.user_type != 'admin':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    # Rolling per-view figures from RequestMetricsMiddleware; each worker process keeps its own
+    return JsonResponse({'pid': os.getpid(), 'views': metrics_snapshot()})
+
+
+@login_required
+def import_grades_upload(request):
+    if request.user.user_type != 'admin':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    if request.method == 'POST':
+        form = GradeImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            
+            # Hand the file to a background worker instead of importing inline
+            extension = os.path.splitext(upload.name)[1].lower()
+            relative_path = f'uploads/{uuid.uuid4().hex}{extension}'
+            destination = job_output_dir() / relative_path
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with open(destination, 'wb') as stored:
+                for chunk in upload.chunks():
+                    stored.write(chunk)
+            
+            job = enqueue('import_grades', {
+                'path': relative_path,
+                'filename': upload.name,
+                'max_errors': MAX_REPORTED_IMPORT_ERRORS,
+            }, user=request.user)
+            messages.success(request, 'Import queued')
+            return redirect('job_detail', job_id=job.id)
+    else:
+        form = GradeImportForm()
+    
+    return render(request, 'grades/import_grades.html', {'form': form})
+
+
+@login_required
+def export_grades_csv(request):
+    if request.user.user_type != 'admin':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    response = StreamingHttpResponse(export_csv_lines(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="grades_export.csv"'
+    return response
+
+
+@login_required
+def admin_batch_transcripts(request):
+    if request.user.user_type != 'admin':
+        messages.error(request, 'Access denied')
+        return redirect('dashboard')
+    
+    if request.method == 'POST':
+        class_id = request.POST.get('class_id') or None
+        class_obj = get_object_or_404(Class, id=class_id) if class_id else None
+        
+        job = enqueue('batch_transcripts', {
+            'class_id': class_obj.id if class_obj else None,
+            'label': class_obj.name if class_obj else 'school',
+        }, user=request.user)
+        messages.success(request, 'Transcript generation queued')
+        return redirect('job_detail', job_id=job.id)
+    
+    return render(request, 'grades/batch_transcripts.html', {
+        'classes': Class.objects.order_by('name')
+    })
+
+
+def get_visible_job(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    if request.user.user_type != 'admin' and job.created_by_id != request.user.id:
+        raise Http404('No Job matches the given query.')
+    return job
+
+
+@login_required
+def job_detail(request, job_id):
+    job = get_visible_job(request, job_id)
+    return render(request, 'grades/job_detail.html', {'job': job})
+
+
+@login_required
+def job_status(request, job_id):
+    job = get_visible_job(request, job_id)
+    return JsonResponse({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'result': job.result,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+        'download_url': reverse('job_download', args=[job.id]) if job.output_path else None,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+
+
+@login_required
+def job_download(request, job_id):
+    job = get_visible_job(request, job_id)
+    if job.status != Job.DONE or not job.output_path:
+        raise Http404('This job has no output.')
+    
+    path = job_output_dir() / job.output_path
+    if not path.is_file():
+        raise Http404('The job output has been removed.')
+    
+    label = job.payload.get('label', job.kind)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{label}_transcripts.zip')
@@ -0,0 +1,23 @@
+import os
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'grading_system.settings')
+
+ASGI_URLCONF = 'grading_system.asgi_urls'
+
+
+class GradingASGIHandler(ASGIHandler):
+    """
+    Resolves requests against ASGI_URLCONF, which serves the read-heavy
+    pages with async views. WSGI keeps the sync views of ROOT_URLCONF.
+    """
+
+    async def get_response_async(self, request):
+        request.urlconf = ASGI_URLCONF
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+application = GradingASGIHandler()
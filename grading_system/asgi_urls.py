@@ -0,0 +1,18 @@
+"""
+URLconf used by the ASGI application: the project URLs with the read-heavy
+pages served by their async views. The paths and names are the same as in
+accounts.urls and grades.urls, and these entries are matched first.
+"""
+from django.urls import path
+
+from accounts import async_views as account_views
+from grades import async_views as grade_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('dashboard/', account_views.dashboard, name='dashboard'),
+    path('grades/student/results/', grade_views.student_results, name='student_results'),
+    path('grades/subjects/<int:subject_id>/grades/', grade_views.subject_grades, name='subject_grades'),
+    path('grades/admin/student/<int:student_id>/grades/', grade_views.admin_student_grades,
+         name='admin_student_grades'),
+] + sync_urlpatterns
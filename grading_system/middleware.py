@@ -0,0 +1,206 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('grading_system.performance')
+
+_samples = defaultdict(deque)
+_samples_lock = threading.Lock()
+_active_recorder = contextvars.ContextVar('request_query_recorder', default=None)
+
+
+def time_budget_ms():
+    return getattr(settings, 'REQUEST_TIME_BUDGET_MS', 500)
+
+
+def metrics_window():
+    return getattr(settings, 'REQUEST_METRICS_WINDOW', 500)
+
+
+def slow_sql_limit():
+    return getattr(settings, 'REQUEST_SLOW_SQL_LIMIT', 20)
+
+
+class QueryRecorder:
+    """execute_wrapper that counts and times every statement on a connection."""
+
+    def __init__(self, keep_sql):
+        self.keep_sql = keep_sql
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if self.keep_sql:
+                self.statements.append((elapsed, sql))
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Route every connection through the recorder of the request being served.
+    The recorder travels in a context variable, which sync_to_async copies
+    into the thread that runs async ORM calls; wrappers installed on the
+    event loop's connections would never see those queries. Inserted first
+    so execute_wrapper() blocks, which pop the last wrapper, stay balanced.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def record_sample(view_name, wall_ms, queries, db_ms, size):
+    with _samples_lock:
+        samples = _samples[view_name]
+        samples.append((wall_ms, queries, db_ms, size))
+        while len(samples) > metrics_window():
+            samples.popleft()
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def metrics_snapshot():
+    """Aggregate of the last REQUEST_METRICS_WINDOW requests for each view in this process."""
+    with _samples_lock:
+        samples = {view: list(rows) for view, rows in _samples.items()}
+
+    snapshot = {}
+    for view, rows in sorted(samples.items()):
+        walls = sorted(row[0] for row in rows)
+        sizes = [row[3] for row in rows if row[3] is not None]
+        snapshot[view] = {
+            'requests': len(rows),
+            'wall_ms_mean': round(sum(walls) / len(walls), 2),
+            'wall_ms_p50': round(_percentile(walls, 0.5), 2),
+            'wall_ms_p95': round(_percentile(walls, 0.95), 2),
+            'wall_ms_max': round(walls[-1], 2),
+            'queries_mean': round(sum(row[1] for row in rows) / len(rows), 2),
+            'queries_max': max(row[1] for row in rows),
+            'db_ms_mean': round(sum(row[2] for row in rows) / len(rows), 2),
+            'bytes_mean': round(sum(sizes) / len(sizes)) if sizes else None,
+        }
+    return snapshot
+
+
+def reset_metrics():
+    with _samples_lock:
+        _samples.clear()
+
+
+def response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    return None
+
+
+class RequestMetricsMiddleware:
+    """
+    Record SQL count, DB time, wall time and response size per resolved
+    view, add them to the response as a Server-Timing header and log
+    requests over REQUEST_TIME_BUDGET_MS together with their SQL.
+
+    Works under WSGI and ASGI; async views are awaited directly rather
+    than pushed through a thread. Wall time stops when the view returns,
+    so the body of a streaming response is not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported missed connection_created
+        for conn in connections.all(initialized_only=True):
+            install_query_recorder(None, conn)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _active_recorder.reset(token)
+        return self.finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _active_recorder.reset(token)
+        return self.finish(request, response, recorder, start)
+
+    def start(self):
+        recorder = QueryRecorder(keep_sql=time_budget_ms() is not None)
+        return recorder, _active_recorder.set(recorder), time.perf_counter()
+
+    def finish(self, request, response, recorder, start):
+        wall_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.seconds * 1000
+
+        match = request.resolver_match
+        view_name = match.view_name if match else '<unresolved>'
+        size = response_size(response)
+        record_sample(view_name, wall_ms, recorder.count, db_ms, size)
+
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+            f'app;dur={wall_ms - db_ms:.1f}, '
+            f'total;dur={wall_ms:.1f}'
+        )
+
+        budget = time_budget_ms()
+        if budget is not None and wall_ms > budget:
+            self.log_slow_request(request, view_name, wall_ms, db_ms, recorder, size)
+        return response
+
+    def log_slow_request(self, request, view_name, wall_ms, db_ms, recorder, size):
+        # Slowest statements first; repeated SQL text is the usual N+1 sign
+        repeats = defaultdict(int)
+        for _, sql in recorder.statements:
+            repeats[sql] += 1
+        slowest = sorted(recorder.statements, key=lambda statement: statement[0], reverse=True)
+        lines = [
+            f'{elapsed * 1000:8.1f} ms  x{repeats[sql]:<4} {sql}'
+            for elapsed, sql in slowest[:slow_sql_limit()]
+        ]
+        logger.warning(
+            'Slow request %s %s (%s): %.1f ms, %d queries, %.1f ms in DB, %s bytes\n%s',
+            request.method,
+            request.path,
+            view_name,
+            wall_ms,
+            recorder.count,
+            db_ms,
+            size if size is not None else '?',
+            '\n'.join(lines),
+        )
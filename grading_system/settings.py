@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'grading_system.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,6 +52,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'grading_system.wsgi.application'
+ASGI_APPLICATION = 'grading_system.asgi.application'
 
 DATABASES = {
     'default': {
@@ -85,6 +87,75 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rendered transcript PDFs, keyed by a fingerprint of their content
+TRANSCRIPT_CACHE_DIR = BASE_DIR / 'transcript_cache'
+TRANSCRIPT_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# Files produced or consumed by background jobs (kept outside MEDIA_ROOT)
+JOB_OUTPUT_DIR = BASE_DIR / 'job_output'
+# Workers record a heartbeat on running jobs this often. A job whose
+# worker went quiet is retried until it has been claimed this many times.
+JOB_HEARTBEAT_SECONDS = 30
+JOB_MAX_ATTEMPTS = 3
+
+# Shared by every process on the host: web workers and run_workers see
+# the same cached scopes, ranks, reports and dashboard counters, so an
+# invalidation in one process reaches all of them. SQLite already keeps
+# the project on one host; move to Redis or Memcached along with a
+# server database.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# Per-view request metrics (grading_system.middleware). Requests slower than
+# the budget are logged with their SQL; set the budget to None to disable.
+REQUEST_TIME_BUDGET_MS = 500
+REQUEST_METRICS_WINDOW = 500
+REQUEST_SLOW_SQL_LIMIT = 20
+
+# Server-sent comment streams (grades.comment_stream), served over ASGI.
+# Comments written by other processes are picked up by a poll this often.
+COMMENT_STREAM_POLL_SECONDS = 5
+COMMENT_STREAM_HEARTBEAT_SECONDS = 15
+COMMENT_STREAM_MAX_SECONDS = 300
+
+# Pragmas run on every new SQLite connection (grading_system.sqlite). Values
+# here override the defaults there; None leaves SQLite's own default.
+SQLITE_PRAGMAS = {
+    # Milliseconds a writer waits for the lock before "database is locked"
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative sizes are KiB: about 64 MB of page cache per connection
+    'cache_size': -64000,
+    'temp_store': 'memory',
+}
+# WAL journal mode with synchronous=NORMAL, for deployments serving
+# concurrent requests: SQLITE_WAL=1 in the environment. Off by default, as
+# the switch is written into the database file itself.
+SQLITE_WAL = os.environ.get('SQLITE_WAL') == '1'
+# How atomic() blocks begin. IMMEDIATE takes the write lock up front, so a
+# transaction that reads before it writes waits for busy_timeout instead of
+# failing at once. Read-only atomic blocks queue behind writers too.
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'grading_system.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
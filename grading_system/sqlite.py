@@ -0,0 +1,96 @@
+import logging
+import re
+import sqlite3
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# What every SQLite connection is switched to unless SQLITE_PRAGMAS says
+# otherwise. busy_timeout comes first so the pragmas after it wait for
+# locks too.
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'temp_store': 'memory',
+}
+# Added when settings.SQLITE_WAL is on. WAL lets readers and one writer
+# work at the same time, but it is written into the database file and adds
+# -wal/-shm files next to it; synchronous=NORMAL is only safe under WAL.
+WAL_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+}
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+TRANSACTION_MODES = {'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'}
+
+
+def sqlite_pragmas(wal=None):
+    """
+    DEFAULT_PRAGMAS, plus WAL_PRAGMAS when `wal` (default: settings.SQLITE_WAL)
+    is on, updated from settings.SQLITE_PRAGMAS; a None value leaves SQLite's default.
+    """
+    if wal is None:
+        wal = getattr(settings, 'SQLITE_WAL', False)
+    pragmas = {**DEFAULT_PRAGMAS, **(WAL_PRAGMAS if wal else {}), **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    for name, value in pragmas.items():
+        # PRAGMA takes no parameters, so the values are written into the SQL
+        if value is not None and not (name.isidentifier() and PRAGMA_VALUE.match(str(value))):
+            raise ImproperlyConfigured(f'SQLITE_PRAGMAS: invalid value {value!r} for {name!r}')
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def transaction_mode():
+    mode = getattr(settings, 'SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+    if mode is not None and mode.upper() not in TRANSACTION_MODES:
+        raise ImproperlyConfigured(f'SQLITE_TRANSACTION_MODE must be one of {sorted(TRANSACTION_MODES)} or None')
+    return mode and mode.upper()
+
+
+def _begin_with_mode(mode):
+    def begin(execute, sql, params, many, context):
+        # Only the bare BEGIN that atomic() issues; an explicit mode is left alone
+        if sql == 'BEGIN':
+            sql = f'BEGIN {mode}'
+        return execute(sql, params, many, context)
+    return begin
+
+
+def _set_journal_mode(db, mode):
+    # Stored in the database file, so normally already set. Switching needs
+    # the file to itself; if another connection is busy, a later one will do it.
+    current = db.execute('PRAGMA journal_mode').fetchone()[0]
+    if current.lower() == str(mode).lower():
+        return
+    try:
+        db.execute(f'PRAGMA journal_mode = {mode}')
+    except sqlite3.OperationalError as error:
+        logger.warning('Could not switch SQLite journal_mode from %s to %s: %s', current, mode, error)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Tune each new SQLite connection. The statements go to the raw sqlite3
+    connection so they are not counted as the current request's queries.
+
+    atomic() blocks also start with BEGIN IMMEDIATE (SQLITE_TRANSACTION_MODE).
+    A deferred transaction that reads before it writes has to upgrade its
+    lock, and when another writer got there first SQLite fails it with
+    "database is locked" at once, without waiting out busy_timeout.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in sqlite_pragmas().items():
+        if name == 'journal_mode':
+            _set_journal_mode(connection.connection, value)
+        else:
+            connection.connection.execute(f'PRAGMA {name} = {value}')
+    mode = transaction_mode()
+    if mode:
+        # First, like the query recorder, so execute_wrapper() blocks that pop the last one stay balanced
+        connection.execute_wrappers.insert(0, _begin_with_mode(mode))